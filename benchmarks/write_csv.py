@@ -0,0 +1,84 @@
+"""Compares `csv.DictWriter` with the tuple-based `write_rows()`.
+
+Usage: PYTHONPATH=. python benchmarks/write_csv.py [CSV_PATH] [REPEAT]
+
+The rows of the processed dataset are loaded as MobilityRow records and
+written to memory with both writers, checking their outputs are identical.
+The writers alternate in each round, so a noisy machine slows both of them
+alike, and the medians of the rounds are compared.
+
+On the 11,830 rows of the dataset, with CPython 3.11.7 on a single shared
+x86_64 CPU, the median speedup was 1.59x to 1.66x across nine runs. It depends
+on the Python version and the machine, so measure it where it matters.
+"""
+
+import csv
+import io
+import statistics
+import sys
+import timeit
+from mobility_reports import MobilityRow
+from mobility_reports.cli import FIELDNAMES, write_rows
+
+
+def load_rows(csv_path):
+    rows = []
+    with open(csv_path, "rt", newline="") as fp:
+        for row in csv.DictReader(fp):
+            data = {}
+            for field, value in row.items():
+                if field in ("region", "updated_at") or (
+                    field == "subregion" and value
+                ):
+                    data[field] = value
+                elif field.endswith("_not_enough_data"):
+                    data[field] = value == "True"
+                elif field != "subregion":
+                    data[field] = float(value) if value else None
+            rows.append(MobilityRow.from_dict(data))
+    return rows
+
+
+def write_with_dict_writer(rows):
+    output = io.StringIO()
+    csvwriter = csv.DictWriter(output, fieldnames=FIELDNAMES)
+    csvwriter.writeheader()
+    csvwriter.writerows(row.as_dict() for row in rows)
+    return output.getvalue()
+
+
+def write_with_tuples(rows):
+    output = io.StringIO()
+    write_rows(output, (row.as_tuple() for row in rows))
+    return output.getvalue()
+
+
+def main():
+    csv_path = (
+        sys.argv[1] if len(sys.argv) > 1 else "data/processed/mobility_reports.csv"
+    )
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 21
+    rows = load_rows(csv_path)
+    assert write_with_tuples(rows) == write_with_dict_writer(rows)
+
+    functions = (write_with_dict_writer, write_with_tuples)
+    timings = {function: [] for function in functions}
+    for _ in range(repeat):
+        for function in functions:
+            timings[function].append(timeit.timeit(lambda: function(rows), number=1))
+
+    print(f"{len(rows)} rows, median of {repeat}")
+    for function in functions:
+        median = statistics.median(timings[function])
+        print(
+            f"{function.__name__}: {median * 1000:.1f} ms "
+            f"(best {min(timings[function]) * 1000:.1f} ms)"
+        )
+    speedup = statistics.median(timings[write_with_dict_writer]) / statistics.median(
+        timings[write_with_tuples]
+    )
+    print(f"Speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
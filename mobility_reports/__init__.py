@@ -1,2 +1,6 @@
-from .template_to_regexp import template_to_regexp
+from .template_to_regexp import template_to_regexp, compile_template, compile_regexp
 from .report_parser import ReportParser
+from .report_document import ReportDocument
+from .mobility_row import MobilityRow
+from .binary_dataset import load
+from .panel import build_panel
@@ -0,0 +1,3 @@
+from mobility_reports.cli import main
+
+main()
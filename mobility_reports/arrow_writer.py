@@ -0,0 +1,118 @@
+import datetime
+import functools
+from .mobility_row import CATEGORIES
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("parquet", "arrow")
+ROW_GROUP_SIZE = 10000
+
+
+def schema():
+    """Returns the Arrow schema of the rows, with the same columns as the CSV.
+
+    The region and subregion are dictionary-encoded, the categories are the
+    same floats written to the CSV (e.g. -0.71), and the "not enough data"
+    flags are booleans, False when they aren't set.
+    """
+    _check_pyarrow()
+    text = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    return pyarrow.schema(
+        [
+            ("region", text),
+            ("subregion", text),
+            ("updated_at", pyarrow.date32()),
+            *[(category, pyarrow.float64()) for category in CATEGORIES],
+            *[
+                (f"{category}_not_enough_data", pyarrow.bool_())
+                for category in CATEGORIES
+            ],
+        ]
+    )
+
+
+class ArrowWriter:
+    """Writes rows to a Parquet file, or to an Arrow IPC stream.
+
+    The rows are tuples in the same order as the CSV columns, as returned by
+    `MobilityRow.as_tuple()`. They're buffered until there are at least
+    `row_group_size` of them, and then written as a row group (or record
+    batch), so they don't wait for the whole run to finish.
+    """
+
+    def __init__(self, sink, format="parquet", row_group_size=ROW_GROUP_SIZE):
+        _check_pyarrow()
+        if format not in FORMATS:
+            raise ValueError(
+                f"Unknown format '{format}', use one of: {', '.join(FORMATS)}"
+            )
+        self.schema = schema()
+        self.row_group_size = row_group_size
+        self._buffer = []
+        if format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(sink, self.schema)
+        else:
+            self._writer = pyarrow.ipc.new_stream(sink, self.schema)
+
+    def write_rows(self, rows):
+        self._buffer += rows
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._writer.write_table(self.to_table(self._buffer))
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def to_table(self, rows):
+        columns = list(zip(*rows))
+        flags_start = 3 + len(CATEGORIES)
+        arrays = [
+            pyarrow.array(columns[0], pyarrow.string()).dictionary_encode(),
+            pyarrow.array(columns[1], pyarrow.string()).dictionary_encode(),
+            pyarrow.array([_parse_date(date) for date in columns[2]], pyarrow.date32()),
+            *[
+                pyarrow.array(values, pyarrow.float64())
+                for values in columns[3:flags_start]
+            ],
+            *[
+                pyarrow.array([flag is True for flag in flags], pyarrow.bool_())
+                for flags in columns[flags_start:]
+            ],
+        ]
+        return pyarrow.Table.from_arrays(arrays, schema=self.schema)
+
+
+def write_reports(reports, sink, format="parquet", row_group_size=ROW_GROUP_SIZE):
+    """Writes the rows of each report, an iterable of lists of tuples, as soon
+    as there are enough of them for a row group."""
+    with ArrowWriter(sink, format, row_group_size) as writer:
+        for rows in reports:
+            writer.write_rows(rows)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_date(date):
+    return datetime.date(*map(int, date.split("-")))
+
+
+def _check_pyarrow():
+    if pyarrow is None:
+        raise ImportError(
+            "The Parquet and Arrow formats require PyArrow to be installed"
+        )
@@ -0,0 +1,146 @@
+import datetime
+import json
+import os
+from .mobility_row import CATEGORIES, MobilityRow
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+VERSION = 1
+HEADER = "dataset.json"
+NULL = -32768
+EPOCH = datetime.date(1970, 1, 1)
+ARRAYS = {
+    "region": "int32",
+    "subregion": "int32",
+    "updated_at": "int32",
+    "values": "int16",
+    "not_enough_data": "uint8",
+}
+
+
+class BinaryDataset:
+    """Rows stored as fixed-width NumPy arrays, one `.npy` file per column.
+
+    `region` and `subregion` are ids into the `strings` table (-1 for the
+    overall rows' subregion), `updated_at` are days since 1970-01-01, and
+    `values` has a column per category with the percentages (e.g. -71 for
+    -0.71), or NULL if there's none. `not_enough_data` is the flags bitmask
+    of MobilityRow. The arrays are memory-mapped read-only when loaded, so
+    they're only read from the disk when accessed, and shared between
+    processes.
+    """
+
+    def __init__(self, strings, region, subregion, updated_at, values, not_enough_data):
+        self.strings = strings
+        self.region = region
+        self.subregion = subregion
+        self.updated_at = updated_at
+        self.values = values
+        self.not_enough_data = not_enough_data
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Encodes MobilityRow records into in-memory arrays, in the same
+        order.
+
+        Categories missing from a row are stored as NULL, like the categories
+        without data, as both are empty in the CSV.
+        """
+        _check_numpy()
+        string_ids = {}
+        columns = {name: [] for name in ARRAYS}
+        for row in rows:
+            columns["region"].append(string_ids.setdefault(row.region, len(string_ids)))
+            if row.subregion is None:
+                columns["subregion"].append(-1)
+            else:
+                columns["subregion"].append(
+                    string_ids.setdefault(row.subregion, len(string_ids))
+                )
+            columns["updated_at"].append(
+                (datetime.date.fromisoformat(row.updated_at) - EPOCH).days
+            )
+            columns["values"].append(
+                [_value_or_null(getattr(row, category)) for category in CATEGORIES]
+            )
+            columns["not_enough_data"].append(row.not_enough_data)
+
+        arrays = {}
+        for name, dtype in ARRAYS.items():
+            arrays[name] = numpy.array(columns[name], dtype=dtype)
+        arrays["values"] = arrays["values"].reshape((-1, len(CATEGORIES)))
+        return cls(list(string_ids), **arrays)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            numpy.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+        header = {
+            "version": VERSION,
+            "rows": len(self),
+            "categories": list(CATEGORIES),
+            "strings": self.strings,
+        }
+        with open(os.path.join(directory, HEADER), "wt", encoding="utf-8") as fp:
+            json.dump(header, fp, ensure_ascii=False)
+
+    def __len__(self):
+        return len(self.region)
+
+    def row(self, index):
+        values = {}
+        for column, category in enumerate(CATEGORIES):
+            value = int(self.values[index, column])
+            values[category] = None if value == NULL else value
+        subregion = int(self.subregion[index])
+        return MobilityRow(
+            self.strings[self.region[index]],
+            None if subregion == -1 else self.strings[subregion],
+            day_to_date(int(self.updated_at[index])),
+            int(self.not_enough_data[index]),
+            **values,
+        )
+
+    def rows(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+
+def write_dataset(rows, directory):
+    """Writes MobilityRow records to a directory, in the same order."""
+    BinaryDataset.from_rows(rows).save(directory)
+
+
+def day_to_date(day):
+    """Returns the ISO date of a number of days since 1970-01-01."""
+    return (EPOCH + datetime.timedelta(days=day)).isoformat()
+
+
+def load(directory):
+    """Memory-maps a dataset written by `write_dataset()`."""
+    _check_numpy()
+    with open(os.path.join(directory, HEADER), "rt", encoding="utf-8") as fp:
+        header = json.load(fp)
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported dataset version {header['version']}")
+
+    arrays = {
+        name: numpy.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        for name in ARRAYS
+    }
+    return BinaryDataset(header["strings"], **arrays)
+
+
+def _value_or_null(value):
+    if isinstance(value, int):
+        return value
+    return NULL
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError("The binary dataset format requires NumPy to be installed")
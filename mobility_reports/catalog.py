@@ -0,0 +1,133 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+from .text_cache import write_atomically
+
+VERSION = 1
+
+
+class ReportCatalog:
+    """Persistent index of report PDFs, by their path.
+
+    Each entry has the report's `ReportParser.probe()` (region, updated_at,
+    page count and content hash), its size and mtime, and the status of its
+    last parse. Files with the same size and mtime as when they were probed
+    are assumed unchanged, so only new or changed files are probed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, "rt", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            data = {"version": VERSION, "reports": {}}
+        if data["version"] != VERSION:
+            raise ValueError(f"Unsupported catalog version {data['version']}")
+        self.reports = data["reports"]
+
+    def stale_paths(self, report_paths):
+        """Returns the paths that are new to the catalog or changed."""
+        return [path for path in report_paths if self.get(path) is None]
+
+    def get(self, report_path):
+        """Returns the entry of a report, or None if it's new or changed."""
+        entry = self.reports.get(os.path.abspath(report_path))
+        if entry is None:
+            return
+        stat = os.stat(report_path)
+        if [entry["mtime_ns"], entry["size"]] != [stat.st_mtime_ns, stat.st_size]:
+            return
+        return entry
+
+    def add(self, report_path, probe):
+        key = os.path.abspath(report_path)
+        stat = os.stat(report_path)
+        previous = self.reports.get(key, {})
+        status = None
+        if previous.get("content_hash") == probe["content_hash"]:
+            status = previous.get("status")
+        self.reports[key] = {
+            **probe,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "status": status,
+        }
+
+    def set_status(self, report_path, status):
+        """Records the status of the last parse of a report, e.g. "parsed"."""
+        self.reports[os.path.abspath(report_path)]["status"] = status
+
+    def unique_paths(self, report_paths):
+        """Returns the paths without the reports whose content is the same as
+        a previous one's."""
+        seen = set()
+        unique_paths = []
+        for path in report_paths:
+            content_hash = self.reports[os.path.abspath(path)]["content_hash"]
+            if content_hash not in seen:
+                seen.add(content_hash)
+                unique_paths.append(path)
+        return unique_paths
+
+    def find(self, region=None, since=None, until=None):
+        """Returns the (path, entry) of the reports of a region, and from
+        `since` to `until`, inclusive, sorted by region, date and path."""
+        found = []
+        for path, entry in self.reports.items():
+            if region is not None and entry["region"] != region:
+                continue
+            if since is not None and (entry["updated_at"] or "") < since:
+                continue
+            if until is not None and (entry["updated_at"] or "") > until:
+                continue
+            found.append((path, entry))
+        return sorted(
+            found,
+            key=lambda item: (
+                item[1]["region"] or "",
+                item[1]["updated_at"] or "",
+                item[0],
+            ),
+        )
+
+    def save(self):
+        data = {"version": VERSION, "reports": self.reports}
+        data = json.dumps(data, sort_keys=True).encode("utf-8")
+        write_atomically(os.path.abspath(self.path), data)
+
+
+def iso_date(value):
+    """Parses a date argument, returning it as an ISO date like 2020-04-05,
+    the format the dates are compared in."""
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid date: '{value}', use the ISO format, like 2020-04-05"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="mobility_reports catalog",
+        description="List the reports in a catalog, without opening them.",
+    )
+    parser.add_argument("path", help="Catalog file path")
+    parser.add_argument("--region", help="Only list the reports of this region")
+    parser.add_argument(
+        "--since", type=iso_date, help="Only list the reports from this date on"
+    )
+    parser.add_argument(
+        "--until", type=iso_date, help="Only list the reports until this date"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    catalog = ReportCatalog(args.path)
+    for path, entry in catalog.find(args.region, args.since, args.until):
+        sys.stdout.write(json.dumps({"path": path, **entry}) + "\n")
@@ -1,69 +1,784 @@
 import argparse
+import collections
+import concurrent.futures
+import contextlib
+import heapq
+import io
+import itertools
+import json
+import os
+import re
 import sys
 import csv
-import subprocess
-from mobility_reports import ReportParser
+import tempfile
+from mobility_reports import ReportParser, MobilityRow
+from mobility_reports.text_cache import TextCache, pdftotext
+from mobility_reports.parse_cache import ParseCache, ReportKeys
+from mobility_reports import (
+    arrow_writer,
+    binary_dataset,
+    catalog,
+    diff,
+    partitions,
+    sqlite_writer,
+)
+from mobility_reports.external_sort import external_sort, DEFAULT_BUFFER_SIZE
 
 
-def parse_args():
+FIELDNAMES = [
+    "region",
+    "subregion",
+    "updated_at",
+    "retail_and_recreation",
+    "grocery_and_pharmacy",
+    "parks",
+    "transit_stations",
+    "workplaces",
+    "residential",
+    "retail_and_recreation_not_enough_data",
+    "grocery_and_pharmacy_not_enough_data",
+    "parks_not_enough_data",
+    "transit_stations_not_enough_data",
+    "workplaces_not_enough_data",
+    "residential_not_enough_data",
+]
+WRITE_CHUNK_SIZE = 10000
+REPORT_FILENAME_REGEXP = re.compile(
+    r"(?P<date>\d{4}-\d{2}-\d{2})_(?P<code>.+?)_Mobility_Report"
+)
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
-        description="Convert Google COVID-19 mobility reports to JSON."
+        description="Convert Google COVID-19 mobility reports to CSV or JSON."
     )
     parser.add_argument(
         "report_paths", nargs="+", help="Google COVID-19 mobility report PDF file path",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["python", "numpy"],
+        default="python",
+        help="Backend used to match the not enough data markers (default: python)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of reports to parse in parallel (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help=(
+            "Only read the first page of each report, writing its region, date, "
+            "page count and content hash as JSON Lines"
+        ),
+    )
+    parser.add_argument(
+        "--catalog",
+        metavar="PATH",
+        help=(
+            "Catalog of the reports, updated with the new or changed ones, used "
+            "to skip reports with the same contents and record their parse status"
+        ),
+    )
+    parser.add_argument(
+        "--region",
+        action="append",
+        dest="regions",
+        metavar="REGION",
+        help=(
+            "Only parse the reports of this region, by its name or its code in "
+            "the file names, like BR or US_Georgia (can be repeated)"
+        ),
+    )
+    parser.add_argument(
+        "--since",
+        metavar="DATE",
+        type=catalog.iso_date,
+        help="Only parse the reports from this date on, like 2020-04-05",
+    )
+    parser.add_argument(
+        "--until",
+        metavar="DATE",
+        type=catalog.iso_date,
+        help="Only parse the reports until this date",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl", *arrow_writer.FORMATS, "sqlite", "npy"],
+        default="csv",
+        help=(
+            "Output format (default: csv). The parquet and arrow (IPC stream) "
+            "formats require PyArrow, and npy requires NumPy. Both sqlite and npy "
+            "(a directory of NumPy arrays) require --output"
+        ),
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="PATH",
+        help="File where the output is written (default: stdout)",
+    )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help=(
+            "Sort the JSON Lines rows by region, subregion and date, instead of "
+            "writing them as each report is parsed (CSV is always sorted)"
+        ),
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help=(
+            "Write a directory, the --output, with a region=<name>/updated_at=<date>"
+            " partition per report and a manifest.json (csv and parquet only)"
+        ),
+    )
+    parser.add_argument(
+        "--update",
+        metavar="CSV_PATH",
+        help=(
+            "Only parse the reports missing from this CSV, and merge their rows "
+            "into it instead of writing to stdout"
+        ),
+    )
+    parser.add_argument(
+        "--sort-buffer-size",
+        metavar="ROWS",
+        type=int,
+        default=DEFAULT_BUFFER_SIZE,
+        help=(
+            "Maximum number of rows kept in memory while sorting, the rest are "
+            f"spilled to temporary files (default: {DEFAULT_BUFFER_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory where the text and rows extracted from the reports are cached",
+    )
 
-    return parser.parse_args()
-
-
-def write_as_csv(data, output):
-    fieldnames = [
-        "region",
-        "subregion",
-        "updated_at",
-        "retail_and_recreation",
-        "grocery_and_pharmacy",
-        "parks",
-        "transit_stations",
-        "workplaces",
-        "residential",
-        "retail_and_recreation_not_enough_data",
-        "grocery_and_pharmacy_not_enough_data",
-        "parks_not_enough_data",
-        "transit_stations_not_enough_data",
-        "workplaces_not_enough_data",
-        "residential_not_enough_data",
-    ]
-    csvwriter = csv.DictWriter(output, fieldnames=fieldnames)
-    csvwriter.writeheader()
+    args = parser.parse_args(argv)
+    if args.update and args.format != "csv":
+        parser.error("--update only supports the csv format")
+    if args.format in ("sqlite", "npy") and not args.output:
+        parser.error(f"--format {args.format} requires --output")
+    if args.partitioned and (args.format not in ("csv", "parquet") or not args.output):
+        parser.error("--partitioned requires --output and the csv or parquet format")
+    return args
+
+
+def write_as_csv(data, output, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Writes the rows sorted by region, subregion and date.
+
+    The rows can be any iterable, like a generator, and at most `buffer_size`
+    of them are kept in memory while sorting. The rest are spilled to
+    temporary files.
+    """
+    sorted_data = external_sort(data, key=_sort_key, buffer_size=buffer_size)
+    write_rows(output, (_as_tuple(row) for row in sorted_data))
+
+
+def write_as_jsonl(reports, output, sort=False, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Writes the rows of each report, an iterable of lists of rows, as JSON
+    objects, one per line.
+
+    The rows are written and flushed as soon as each report is parsed, unless
+    they're sorted, like in `write_as_csv()`.
+    """
+    if sort:
+        all_data = itertools.chain.from_iterable(data or [] for data in reports)
+        sorted_data = external_sort(all_data, key=_sort_key, buffer_size=buffer_size)
+        reports = _chunks(sorted_data, WRITE_CHUNK_SIZE)
 
-    sorted_data = sorted(
-        data,
-        key=lambda row: (row["region"], row.get("subregion", ""), row["updated_at"]),
+    for data in reports:
+        if data:
+            output.write("".join(json.dumps(_as_dict(row)) + "\n" for row in data))
+            output.flush()
+
+
+def write_as_arrow(reports, output, format="parquet"):
+    """Writes the rows of each report, an iterable of lists of rows, in the
+    Parquet or Arrow IPC stream format.
+
+    Unlike `write_as_csv()`, the rows are written as the reports are parsed,
+    in row groups, so only each report's rows are sorted.
+    """
+    arrow_writer.write_reports(
+        (
+            [_as_tuple(row) for row in sorted(data, key=_sort_key)]
+            for data in reports
+            if data
+        ),
+        output,
+        format,
+    )
+
+
+def write_as_sqlite(reports, path):
+    """Writes the rows of each report, an iterable of lists of rows, to a
+    SQLite database, replacing the existing rows with the same region,
+    subregion and date."""
+    sqlite_writer.write_reports(
+        ([_as_tuple(row) for row in data] for data in reports if data), path
+    )
+
+
+def write_as_partitions(reports, directory, format="csv"):
+    """Writes the rows of each report, an iterable of lists of rows, to a
+    partition per region and date in `directory`, in CSV or Parquet, as the
+    reports are parsed. Returns the updated manifest."""
+    write_partition = {
+        "csv": _write_csv_partition,
+        "parquet": _write_parquet_partition,
+    }[format]
+    return partitions.write_partitions(
+        (
+            [_as_tuple(row) for row in sorted(data, key=_sort_key)]
+            for data in reports
+            if data
+        ),
+        directory,
+        write_partition,
+        format,
     )
-    csvwriter.writerows(sorted_data)
 
 
-def main():
-    args = parse_args()
+def _write_csv_partition(path, rows):
+    with open(path, "wt", newline="") as output:
+        write_rows(output, rows)
+
+
+def _write_parquet_partition(path, rows):
+    with arrow_writer.ArrowWriter(path, "parquet") as writer:
+        writer.write_rows(rows)
+
+
+def write_as_npy(data, directory, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Writes the rows sorted like `write_as_csv()` as a directory of NumPy
+    arrays, which `mobility_reports.load()` memory-maps."""
+    sorted_data = external_sort(data, key=_sort_key, buffer_size=buffer_size)
+    rows = (
+        row if isinstance(row, MobilityRow) else MobilityRow.from_dict(row)
+        for row in sorted_data
+    )
+    binary_dataset.write_dataset(rows, directory)
+
+
+def write_rows(output, rows):
+    """Writes the header and the rows, tuples in the same order as FIELDNAMES.
+
+    The output is the same as `csv.DictWriter`'s, but each chunk of rows is
+    written at once, to a buffer, which is then written to the output.
+    """
+    output.write(_format_rows([FIELDNAMES]))
+    for chunk in _chunks(rows, WRITE_CHUNK_SIZE):
+        output.write(_format_rows(chunk))
 
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _format_rows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _sort_key(row):
+    if isinstance(row, MobilityRow):
+        return row.sort_key()
+    return (row["region"], row.get("subregion", ""), row["updated_at"])
+
+
+def _as_dict(row):
+    if isinstance(row, MobilityRow):
+        return row.as_dict()
+    return row
+
+
+def _tuple_sort_key(row):
+    return (row[0], row[1] or "", row[2])
+
+
+def _as_tuple(row):
+    if isinstance(row, MobilityRow):
+        return row.as_tuple()
+    return tuple(row.get(field) for field in FIELDNAMES)
+
+
+def parse_report(report_path, backend="python", extract=pdftotext):
+    """Returns the report's rows, or None if it's unparseable."""
+    text = extract(report_path)
+    parser = ReportParser(backend=backend)
+    try:
+        data = parser.parse(text)
+    except ValueError:
+        # Ignore value errors, raised when the file is unparseable.
+        return
+    except Exception as e:
+        raise ValueError(f"Could not parse report {report_path}") from e
+    return [MobilityRow.from_dict(row) for row in data]
+
+
+def parse_reports(
+    report_paths,
+    jobs=1,
+    backend="python",
+    extract=pdftotext,
+    stats=None,
+    parse_cache=None,
+):
+    """Parses the reports in a pool of `jobs` processes.
+
+    The reports are parsed in whatever order the processes finish them, but
+    their rows are returned in the same order of `report_paths`. If `extract`
+    keeps statistics, like a TextCache, they're added to the `stats` Counter.
+    Reports found in the `parse_cache` aren't extracted nor parsed again.
+    """
     all_data = []
-    for report_path in args.report_paths:
-        text = subprocess.check_output(
-            ["pdftotext", "-layout", report_path, "-"], universal_newlines=True
-        )
-        parser = ReportParser()
-        try:
-            data = parser.parse(text)
-        except ValueError:
-            # Ignore value errors, raised when the file is unparseable.
-            continue
-        except Exception as e:
-            raise ValueError(f"Could not parse report {report_path}") from e
+    for data in iter_reports(report_paths, jobs, backend, extract, stats, parse_cache):
         if data:
             all_data += data
+    return all_data
 
-    write_as_csv(all_data, sys.stdout)
+
+def iter_reports(
+    report_paths,
+    jobs=1,
+    backend="python",
+    extract=pdftotext,
+    stats=None,
+    parse_cache=None,
+):
+    """Like `parse_reports()`, but yields the rows of each report (or None,
+    if it's unparseable) as soon as it and the ones before it are parsed."""
+    if stats is None:
+        stats = collections.Counter()
+
+    cached = [bool(parse_cache) and path in parse_cache for path in report_paths]
+    pending = [path for (path, found) in zip(report_paths, cached) if not found]
+    results = _imap_in_pool(
+        _parse_report_task, [(path, backend, extract) for path in pending], jobs
+    )
+    for (path, found) in zip(report_paths, cached):
+        if found:
+            (_, data) = parse_cache.get(path)
+        else:
+            (data, extract_stats) = next(results)
+            stats.update(extract_stats)
+            if parse_cache:
+                parse_cache.stats["misses"] += 1
+                parse_cache.put(path, data)
+        yield data
+
+    if parse_cache:
+        parse_cache.save()
+
+
+def write_probes(report_paths, output, jobs=1, catalog=None):
+    """Writes the `ReportParser.probe()` of each report as JSON Lines, in a
+    pool of `jobs` processes. If there's an up to date `catalog`, its entries
+    are written instead."""
+    if catalog:
+        probes = [catalog.get(path) for path in report_paths]
+    else:
+        probes = _imap_in_pool(_probe_task, [(path,) for path in report_paths], jobs)
+    for (path, probe) in zip(report_paths, probes):
+        output.write(json.dumps({"path": path, **probe}) + "\n")
+
+
+def update_catalog(catalog, report_paths, jobs=1):
+    """Probes the reports that are new to the catalog, or changed, in a pool
+    of `jobs` processes, and saves it."""
+    stale_paths = catalog.stale_paths(report_paths)
+    probes = _imap_in_pool(_probe_task, [(path,) for path in stale_paths], jobs)
+    for (path, probe) in zip(stale_paths, probes):
+        catalog.add(path, probe)
+    catalog.save()
+
+
+def _record_statuses(reports, report_paths, catalog):
+    for (path, data) in zip(report_paths, reports):
+        catalog.set_status(path, "unparseable" if data is None else "parsed")
+        yield data
+    catalog.save()
+
+
+def _probe_task(report_path):
+    return ReportParser().probe(report_path)
+
+
+def extract_first_page(report_path):
+    return pdftotext(report_path, first_page=1, last_page=1)
+
+
+def report_key(report_path, extract=extract_first_page):
+    """Returns the report's (region, updated_at), parsed from the text
+    returned by `extract`, or None if the header is unparseable. Only the
+    first page is extracted by default, as it's the only one needed."""
+    return ReportParser().parse_header(extract(report_path))
+
+
+def report_keys(report_paths, jobs=1, extract_key=extract_first_page, key_cache=None):
+    """Returns the `report_key()` of each report, reading the headers in a
+    pool of `jobs` processes. The reports found in the `key_cache`, a
+    ReportKeys, aren't extracted again."""
+    cached = [
+        key_cache.get(path) if key_cache else (False, None) for path in report_paths
+    ]
+    pending = [path for (path, (found, _)) in zip(report_paths, cached) if not found]
+    new_keys = _imap_in_pool(
+        report_key, [(path, extract_key) for path in pending], jobs
+    )
+
+    keys = []
+    for (path, (found, key)) in zip(report_paths, cached):
+        if not found:
+            key = next(new_keys)
+            if key_cache:
+                key_cache.put(path, key)
+        keys.append(key)
+    if key_cache:
+        key_cache.save()
+    return keys
+
+
+def filter_reports(
+    report_paths,
+    regions=None,
+    since=None,
+    until=None,
+    jobs=1,
+    catalog=None,
+    extract_key=extract_first_page,
+    key_cache=None,
+):
+    """Returns the reports of any of the `regions`, from `since` to `until`,
+    inclusive, without extracting nor parsing the other reports.
+
+    The date and region code in the file names, like 2020-03-29_BR_..., are
+    checked first. A region can be either its name, like in the CSV, or its
+    code in the file names. If all the `regions` are codes of the file names,
+    the reports with other codes are left out by their file names too. Only
+    the reports that can't be selected by their
+    file names are looked up in the `catalog`, if there's one, probing the new
+    or changed ones, or have their header read with `report_keys()`. Reports
+    without a header are left out.
+    """
+    regions = set(regions or [])
+    filename_keys = [_parse_report_filename(path) for path in report_paths]
+    codes = {key[1] for key in filename_keys if key}
+    selected = [None] * len(report_paths)
+    unknown = []
+    for (index, filename_key) in enumerate(filename_keys):
+        if filename_key:
+            (date, code) = filename_key
+            if not _is_in_range(date, since, until):
+                selected[index] = False
+                continue
+            if not regions or code in regions:
+                selected[index] = True
+                continue
+            if regions <= codes:
+                selected[index] = False
+                continue
+        unknown.append(index)
+
+    unknown_paths = [report_paths[index] for index in unknown]
+    if catalog:
+        update_catalog(catalog, unknown_paths, jobs)
+        keys = [
+            (entry["region"], entry["updated_at"])
+            for entry in map(catalog.get, unknown_paths)
+        ]
+    else:
+        keys = report_keys(unknown_paths, jobs, extract_key, key_cache)
+    for (index, key) in zip(unknown, keys):
+        selected[index] = _is_selected(key, regions, since, until)
+
+    return [path for (path, is_selected) in zip(report_paths, selected) if is_selected]
+
+
+def _parse_report_filename(report_path):
+    match = REPORT_FILENAME_REGEXP.match(os.path.basename(report_path))
+    if match:
+        return match.group("date"), match.group("code")
+
+
+def _is_selected(key, regions, since, until):
+    if key is None or key[0] is None:
+        return False
+    (region, updated_at) = key
+    return (not regions or region in regions) and _is_in_range(updated_at, since, until)
+
+
+def _is_in_range(date, since, until):
+    return (since is None or date >= since) and (until is None or date <= until)
+
+
+def update_csv(
+    csv_path,
+    report_paths,
+    jobs=1,
+    backend="python",
+    extract=pdftotext,
+    stats=None,
+    parse_cache=None,
+    extract_key=extract_first_page,
+    key_cache=None,
+):
+    """Parses the reports missing from the CSV and merges their rows into it.
+
+    A report is missing if there are no rows with its (region, updated_at),
+    which is read from its header with `report_keys()`, so the reports already
+    in the CSV are never fully extracted nor parsed. The existing rows of the
+    reports parsed again are replaced, and if several of the new reports have
+    the same (region, updated_at), only the last one's rows are kept. Returns
+    the number of reports parsed.
+
+    With a `parse_cache`, the reports that aren't cached by the current parser
+    version are missing too, so a parser change reaches the rows already in
+    the CSV.
+    """
+    existing_keys = read_csv_keys(csv_path)
+    keys = report_keys(report_paths, jobs, extract_key, key_cache)
+    missing_paths = [
+        path
+        for (path, key) in zip(report_paths, keys)
+        if key is None
+        or key not in existing_keys
+        or (parse_cache and path not in parse_cache)
+    ]
+    reports = iter_reports(missing_paths, jobs, backend, extract, stats, parse_cache)
+    data = list(itertools.chain.from_iterable(_latest_reports(reports)))
+    if data or not os.path.exists(csv_path):
+        merge_into_csv(csv_path, data)
+    return len(missing_paths)
+
+
+def _latest_reports(reports):
+    """Returns the rows of each report, leaving out the reports with the same
+    (region, updated_at) as a later one."""
+    latest = {}
+    for data in reports:
+        if data:
+            latest[(data[0].region, data[0].updated_at)] = data
+    return list(latest.values())
+
+
+def read_csv_keys(csv_path):
+    """Returns the (region, updated_at) of the rows in a CSV."""
+    try:
+        with open(csv_path, "rt", newline="") as fp:
+            return {(row["region"], row["updated_at"]) for row in csv.DictReader(fp)}
+    except FileNotFoundError:
+        return set()
+
+
+def merge_into_csv(csv_path, data):
+    """Merges the rows into a CSV sorted by `write_as_csv()` in a single pass.
+
+    The existing rows with the same (region, updated_at) as any of the new
+    rows are replaced by them. The CSV is replaced atomically.
+    """
+    new_rows = sorted((_as_tuple(row) for row in data), key=_tuple_sort_key)
+    new_keys = {(row[0], row[2]) for row in new_rows}
+
+    directory = os.path.dirname(os.path.abspath(csv_path))
+    (fd, tmp_path) = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wt", newline="") as output:
+            with _open_or_empty(csv_path) as existing:
+                existing_rows = (
+                    row
+                    for row in _read_rows(existing)
+                    if (row[0], row[2]) not in new_keys
+                )
+                write_rows(
+                    output, heapq.merge(existing_rows, new_rows, key=_tuple_sort_key)
+                )
+        os.replace(tmp_path, csv_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_rows(fp):
+    """Reads the rows of a CSV written by `write_rows()`, as lists in the
+    same order as FIELDNAMES."""
+    reader = csv.reader(fp)
+    header = next(reader, None)
+    if header is None:
+        return
+    if header != FIELDNAMES:
+        columns = [header.index(field) for field in FIELDNAMES]
+        reader = ([row[column] for column in columns] for row in reader)
+    yield from reader
+
+
+def _open_or_empty(path):
+    try:
+        return open(path, "rt", newline="")
+    except FileNotFoundError:
+        return io.StringIO()
+
+
+def _imap_in_pool(function, args_list, jobs):
+    """Calls `function` with each of the `args_list` in a pool of `jobs`
+    processes, yielding the results in the same order as `args_list`.
+
+    The results are collected as they complete, so an error is raised as soon
+    as any call fails, and buffered until the ones before them are yielded.
+    A slow call still holds back the results after it.
+    """
+    if jobs <= 1 or len(args_list) <= 1:
+        for args in args_list:
+            yield function(*args)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(function, *args): index
+            for (index, args) in enumerate(args_list)
+        }
+        results = {}
+        next_index = 0
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+                while next_index in results:
+                    yield results.pop(next_index)
+                    next_index += 1
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+@contextlib.contextmanager
+def _open_output(path, mode):
+    if path is None:
+        yield sys.stdout.buffer if "b" in mode else sys.stdout
+        return
+    with open(path, mode, newline=None if "b" in mode else "") as fp:
+        yield fp
+
+
+def _parse_report_task(report_path, backend, extract):
+    data = parse_report(report_path, backend, extract)
+    if hasattr(extract, "pop_stats"):
+        return data, extract.pop_stats()
+    return data, {}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["diff"]:
+        diff.main(argv[1:])
+        return
+    if argv[:1] == ["catalog"]:
+        catalog.main(argv[1:])
+        return
+
+    args = parse_args(argv)
+    report_paths = args.report_paths
+    key_cache = None
+    if args.cache_dir:
+        key_cache = ReportKeys(os.path.join(args.cache_dir, "keys.json"))
+    report_catalog = None
+    if args.catalog:
+        report_catalog = catalog.ReportCatalog(args.catalog)
+    if args.regions or args.since or args.until:
+        report_paths = filter_reports(
+            report_paths,
+            args.regions,
+            args.since,
+            args.until,
+            args.jobs,
+            report_catalog,
+            key_cache=key_cache,
+        )
+    if report_catalog:
+        update_catalog(report_catalog, report_paths, args.jobs)
+        report_paths = report_catalog.unique_paths(report_paths)
+
+    if args.probe:
+        with _open_output(args.output, "wt") as output:
+            write_probes(report_paths, output, args.jobs, report_catalog)
+        return
+
+    extract = pdftotext
+    parse_cache = None
+    if args.cache_dir:
+        extract = TextCache(args.cache_dir)
+        parse_cache = ParseCache(args.cache_dir)
+
+    stats = collections.Counter()
+    if args.update:
+        update_csv(
+            args.update,
+            report_paths,
+            args.jobs,
+            args.backend,
+            extract,
+            stats=stats,
+            parse_cache=parse_cache,
+            key_cache=key_cache,
+        )
+    else:
+        reports = iter_reports(
+            report_paths,
+            args.jobs,
+            args.backend,
+            extract,
+            stats=stats,
+            parse_cache=parse_cache,
+        )
+        if report_catalog:
+            reports = _record_statuses(reports, report_paths, report_catalog)
+        if args.partitioned:
+            write_as_partitions(reports, args.output, args.format)
+        elif args.format == "csv":
+            all_data = itertools.chain.from_iterable(data or [] for data in reports)
+            with _open_output(args.output, "wt") as output:
+                write_as_csv(all_data, output, args.sort_buffer_size)
+        elif args.format == "jsonl":
+            with _open_output(args.output, "wt") as output:
+                write_as_jsonl(reports, output, args.sort, args.sort_buffer_size)
+        elif args.format == "npy":
+            all_data = itertools.chain.from_iterable(data or [] for data in reports)
+            write_as_npy(all_data, args.output, args.sort_buffer_size)
+        elif args.format == "sqlite":
+            write_as_sqlite(reports, args.output)
+        else:
+            with _open_output(args.output, "wb") as output:
+                write_as_arrow(reports, output, args.format)
+
+    if args.cache_dir:
+        print(
+            f"Headers cache: {key_cache.stats['hits']} hits, "
+            f"{key_cache.stats['misses']} misses",
+            file=sys.stderr,
+        )
+        print(
+            f"Rows cache: {parse_cache.stats['hits']} hits, "
+            f"{parse_cache.stats['misses']} misses",
+            file=sys.stderr,
+        )
+        print(
+            f"Text cache: {stats['hits']} hits, {stats['misses']} misses",
+            file=sys.stderr,
+        )
 
 
 if __name__ == "__main__":
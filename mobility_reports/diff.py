@@ -0,0 +1,156 @@
+import argparse
+import csv
+import sys
+from .catalog import iso_date
+from .mobility_row import CATEGORIES, MobilityRow
+from .store import read_rows
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ReportDiff:
+    """Changes of the regions and subregions between two report dates.
+
+    `entities` are the (region, subregion) pairs in both dates, sorted by
+    the `magnitude` of their change, the sum of the absolute `deltas` of
+    their categories, largest first. `deltas` has a row per entity and a
+    column per category, NaN where either date has no data. `appeared` and
+    `disappeared` are the entities in only one of the dates.
+    """
+
+    def __init__(self, entities, deltas, magnitude, appeared, disappeared):
+        self.entities = entities
+        self.deltas = deltas
+        self.magnitude = magnitude
+        self.appeared = appeared
+        self.disappeared = disappeared
+        self.categories = CATEGORIES
+
+
+def diff(old_rows, new_rows):
+    """Compares the rows of two report dates, MobilityRow records or dicts.
+
+    The rows are hash-joined on their (region, subregion), and the deltas of
+    every entity and category are computed at once, so the cost is linear in
+    the number of rows, except for sorting the changes.
+    """
+    _check_numpy()
+    old = _values_by_entity(old_rows)
+    new = _values_by_entity(new_rows)
+    entities = [entity for entity in new if entity in old]
+
+    shape = (len(entities), len(CATEGORIES))
+    old_values = numpy.array([old[entity] for entity in entities], float).reshape(shape)
+    new_values = numpy.array([new[entity] for entity in entities], float).reshape(shape)
+    deltas = new_values - old_values
+    magnitude = numpy.nansum(numpy.abs(deltas), axis=1)
+    order = numpy.argsort(-magnitude, kind="stable")
+
+    return ReportDiff(
+        [entities[index] for index in order],
+        deltas[order],
+        magnitude[order],
+        appeared=[entity for entity in new if entity not in old],
+        disappeared=[entity for entity in old if entity not in new],
+    )
+
+
+def diff_dates(rows, old_date, new_date):
+    """Compares the rows of two report dates, read in a single pass."""
+    old_rows = []
+    new_rows = []
+    for row in rows:
+        row = _to_mobility_row(row)
+        if row.updated_at == old_date:
+            old_rows.append(row)
+        elif row.updated_at == new_date:
+            new_rows.append(row)
+    return diff(old_rows, new_rows)
+
+
+def write_diff(report_diff, output):
+    """Writes the changed, appeared and disappeared entities as CSV."""
+    csvwriter = csv.writer(output)
+    csvwriter.writerow(["change", "region", "subregion", "magnitude", *CATEGORIES])
+    for index, (region, subregion) in enumerate(report_diff.entities):
+        deltas = [_format_delta(delta) for delta in report_diff.deltas[index]]
+        magnitude = _format_delta(report_diff.magnitude[index])
+        csvwriter.writerow(["changed", region, subregion, magnitude, *deltas])
+    for change, entities in (
+        ("appeared", report_diff.appeared),
+        ("disappeared", report_diff.disappeared),
+    ):
+        for region, subregion in entities:
+            csvwriter.writerow([change, region, subregion])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="mobility_reports diff",
+        description=(
+            "Compare two report dates, listing the regions and subregions that "
+            "changed the most, appeared or disappeared."
+        ),
+    )
+    parser.add_argument(
+        "path",
+        help="Rows in any of the output formats, like the CSV",
+    )
+    parser.add_argument(
+        "--from",
+        dest="old_date",
+        type=iso_date,
+        help="Date of the older reports (default: the second latest)",
+    )
+    parser.add_argument(
+        "--to",
+        dest="new_date",
+        type=iso_date,
+        help="Date of the newer reports (default: the latest)",
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    rows = list(read_rows(args.path))
+    dates = sorted({row.updated_at for row in rows})
+    new_date = args.new_date or max(dates, default=None)
+    old_date = args.old_date or max(
+        [date for date in dates if date < new_date], default=None
+    )
+    if old_date is None or new_date is None or old_date == new_date:
+        parser.error(f"{args.path} doesn't have two different report dates to compare")
+    write_diff(diff_dates(rows, old_date, new_date), sys.stdout)
+
+
+def _values_by_entity(rows):
+    values = {}
+    for row in rows:
+        row = _to_mobility_row(row)
+        values[(row.region, row.subregion)] = [
+            numpy.nan if value is None else value
+            for value in row.as_tuple()[3 : 3 + len(CATEGORIES)]
+        ]
+    return values
+
+
+def _to_mobility_row(row):
+    if isinstance(row, MobilityRow):
+        return row
+    return MobilityRow.from_dict(row)
+
+
+def _format_delta(delta):
+    if numpy.isnan(delta):
+        return ""
+    return round(float(delta), 2)
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError("The diff requires NumPy to be installed")
@@ -0,0 +1,50 @@
+import heapq
+import pickle
+import tempfile
+
+DEFAULT_BUFFER_SIZE = 1000000
+
+
+def external_sort(items, key, buffer_size=DEFAULT_BUFFER_SIZE, directory=None):
+    """Yields the items in the same order as `sorted(items, key=key)`.
+
+    At most `buffer_size` items are kept in memory. Whenever the buffer is
+    full, it's sorted and spilled to a temporary file in `directory` as a
+    sorted run, and the runs are merged with `heapq.merge()` at the end. As
+    the runs are in the items' order, and both `sorted()` and `heapq.merge()`
+    are stable, items with equal keys keep their order.
+    """
+    runs = []
+    buffer = []
+    try:
+        for item in items:
+            buffer.append(item)
+            if len(buffer) >= buffer_size:
+                buffer.sort(key=key)
+                runs.append(_spill(buffer, directory))
+                buffer = []
+        buffer.sort(key=key)
+
+        if not runs:
+            yield from buffer
+            return
+        yield from heapq.merge(*(_read_run(run) for run in runs), buffer, key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _spill(items, directory):
+    run = tempfile.TemporaryFile(dir=directory)
+    for item in items:
+        pickle.dump(item, run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    while True:
+        try:
+            yield pickle.load(run)
+        except EOFError:
+            return
@@ -0,0 +1,126 @@
+import sys
+
+CATEGORIES = (
+    "retail_and_recreation",
+    "grocery_and_pharmacy",
+    "parks",
+    "transit_stations",
+    "workplaces",
+    "residential",
+)
+
+
+class _Missing:
+    """Marks the categories missing from a row, which aren't the same as the
+    categories without data (None). Only the overall rows can miss them."""
+
+    def __reduce__(self):
+        return "_MISSING"
+
+    def __repr__(self):
+        return "_MISSING"
+
+
+_MISSING = _Missing()
+
+
+class MobilityRow:
+    """A compact version of the rows returned by `ReportParser.parse()`.
+
+    The percentages are kept as integers (e.g. -71 instead of -0.71), which
+    Python shares for small values, and the six "not enough data" flags are
+    packed in a single bitmask. The region, subregion and date strings are
+    interned, so they're shared by all rows with the same values.
+    """
+
+    __slots__ = (
+        "region",
+        "subregion",
+        "updated_at",
+        "not_enough_data",
+        *CATEGORIES,
+    )
+
+    def __init__(self, region, subregion, updated_at, not_enough_data=0, **values):
+        self.region = _intern(region)
+        self.subregion = _intern(subregion)
+        self.updated_at = _intern(updated_at)
+        self.not_enough_data = not_enough_data
+        for category in CATEGORIES:
+            setattr(self, category, values.get(category, _MISSING))
+
+    @classmethod
+    def from_dict(cls, row):
+        values = {}
+        not_enough_data = 0
+        for bit, category in enumerate(CATEGORIES):
+            if category in row:
+                value = row[category]
+                values[category] = None if value is None else round(value * 100)
+            if row.get(f"{category}_not_enough_data"):
+                not_enough_data |= 1 << bit
+
+        return cls(
+            row["region"],
+            row.get("subregion"),
+            row["updated_at"],
+            not_enough_data,
+            **values,
+        )
+
+    def as_dict(self):
+        """Returns the row as `ReportParser.parse()` would."""
+        row = {"region": self.region, "updated_at": self.updated_at}
+        if self.subregion is not None:
+            row["subregion"] = self.subregion
+        for bit, category in enumerate(CATEGORIES):
+            value = getattr(self, category)
+            if value is not _MISSING:
+                row[category] = None if value is None else value / 100
+            if self.not_enough_data & (1 << bit):
+                row[f"{category}_not_enough_data"] = True
+        return row
+
+    def as_tuple(self):
+        """Returns the region, subregion, updated_at, the categories and their
+        "not enough data" flags, in this order. Missing values and flags that
+        aren't set are None."""
+        values = []
+        flags = []
+        for bit, category in enumerate(CATEGORIES):
+            value = getattr(self, category)
+            values.append(None if value is None or value is _MISSING else value / 100)
+            flags.append(True if self.not_enough_data & (1 << bit) else None)
+        return (self.region, self.subregion, self.updated_at, *values, *flags)
+
+    def has_enough_data(self, category):
+        return not self.not_enough_data & (1 << CATEGORIES.index(category))
+
+    def sort_key(self):
+        return (self.region, self.subregion or "", self.updated_at)
+
+    def __eq__(self, other):
+        if not isinstance(other, MobilityRow):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"MobilityRow({self.as_dict()!r})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+        self.region = _intern(self.region)
+        self.subregion = _intern(self.subregion)
+        self.updated_at = _intern(self.updated_at)
+
+
+def _intern(value):
+    if value is None:
+        return None
+    return sys.intern(value)
@@ -0,0 +1,229 @@
+import re
+import bisect
+from .template_to_regexp import compile_regexp
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COLUMNS = {
+    "retail_and_recreation": "Retail & recreation",
+    "grocery_and_pharmacy": "Grocery & pharmacy",
+    "parks": "Parks",
+    "transit_stations": "Transit stations",
+    "workplaces": "Workplace",
+    "residential": "Residential",
+}
+
+_COLUMNS_KEYS = {column: key for (key, column) in COLUMNS.items()}
+_MARKERS_REGEXP = compile_regexp(
+    "|".join(re.escape(column) for column in [*COLUMNS.values(), "*"])
+)
+
+LINE_BAND = 16
+COLUMN_BAND = 16
+
+
+class MarkersIndex:
+    """Column names and asterisks in a report, bucketed in a grid.
+
+    The grid cells are keyed by (line band, column band). Each page is
+    indexed once, the first time a subregion block in it is queried, and
+    shared by every other block in the same page.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.labels = {}
+        self.asterisks = {}
+        self.max_column_band = 0
+        self._indexed_pages = set()
+
+    def _index_lines(self, first_line, last_line):
+        index = self.document.index
+        first_page = bisect.bisect_right(
+            index.page_starts, index.line_starts[first_line]
+        )
+        last_page = bisect.bisect_right(index.page_starts, index.line_starts[last_line])
+        for page in range(first_page - 1, last_page):
+            if page not in self._indexed_pages:
+                self._index_page(page)
+                self._indexed_pages.add(page)
+
+    def _index_page(self, page):
+        index = self.document.index
+        lines = index.page_lines(page)
+        if not lines:
+            return
+        page_start = index.line_starts[lines[0]]
+        page_end = index.line_ends[lines[-1]]
+
+        line = lines[0]
+        for match in _MARKERS_REGEXP.finditer(self.document.text, page_start, page_end):
+            x = match.start()
+            while index.line_ends[line] < x:
+                line += 1
+            if match.group() == "*":
+                cell = (line // LINE_BAND, (x - index.line_starts[line]) // COLUMN_BAND)
+                self.asterisks.setdefault(cell, []).append((x, line))
+                self.max_column_band = max(self.max_column_band, cell[1])
+            elif match.end() <= index.line_ends[line]:
+                key = _COLUMNS_KEYS[match.group()]
+                self.labels.setdefault(line, []).append((x, match.end(), key))
+
+    def find_columns(self, start, end):
+        """Returns the (x, y) position of each column name in text[start:end].
+
+        Like scanning `text[start:end].splitlines()` with `str.find()`, it
+        keeps the first occurrence of each column name in a line and the last
+        line each one appears, stopping at the first line where all columns
+        were seen.
+        """
+        index = self.document.index
+        first_line, last_line = self._lines_range(start, end)
+        self._index_lines(first_line, last_line)
+
+        columns_positions = {}
+        for line in range(first_line, last_line + 1):
+            if line not in self.labels:
+                continue
+            row_start, row_end = index.line_span(line, start, end)
+            found = {}
+            for label_start, label_end, key in self.labels[line]:
+                if key in found or label_start < row_start or label_end > row_end:
+                    continue
+                found[key] = label_start - row_start + (label_end - label_start) // 2
+            for key in COLUMNS:
+                if key in found:
+                    columns_positions[key] = (found[key], line - first_line)
+            if len(columns_positions) == len(COLUMNS):
+                break
+        return columns_positions
+
+    def find_asterisks(self, start, end, min_y, max_y):
+        """Returns the (x, y) position of the asterisks in text[start:end],
+        in lines `min_y` to `max_y`, sorted by line and column."""
+        index = self.document.index
+        first_line, last_line = self._lines_range(start, end)
+        min_line = first_line + min_y
+        max_line = min(first_line + max_y, last_line)
+        if min_line > max_line:
+            return []
+        self._index_lines(min_line, max_line)
+
+        asterisks = []
+        for line_band in range(min_line // LINE_BAND, max_line // LINE_BAND + 1):
+            for column_band in range(self.max_column_band + 1):
+                asterisks += self.asterisks.get((line_band, column_band), [])
+
+        asterisks_positions = []
+        for offset, line in sorted(asterisks):
+            if line < min_line or line > max_line:
+                continue
+            row_start, row_end = index.line_span(line, start, end)
+            if row_start <= offset < row_end:
+                asterisks_positions.append((offset - row_start, line - first_line))
+        return asterisks_positions
+
+    def _lines_range(self, start, end):
+        if start >= end:
+            return (0, -1)
+        index = self.document.index
+        return (index.locate(start)[1], index.locate(end - 1)[1])
+
+
+def assign_asterisks_to_columns(columns_positions, asterisks_positions):
+    """Greedily matches each asterisk to its nearest column without one.
+
+    The columns are bucketed in a grid, so each asterisk only looks at the
+    cells around it, in rings of increasing distance. A column in a ring
+    farther than `r` is at least `r` bands away, so the search stops as soon
+    as the nearest column found is closer than that. Ties are broken by the
+    columns' order, as in a linear scan over `columns_positions`.
+    """
+    min_band = min(LINE_BAND, COLUMN_BAND)
+    cells = {}
+    for order, (col, (col_x, col_y)) in enumerate(columns_positions.items()):
+        cell = (col_y // LINE_BAND, col_x // COLUMN_BAND)
+        cells.setdefault(cell, []).append((order, col, col_x, col_y))
+    max_ring = max(
+        [max(abs(line_band), abs(column_band)) for (line_band, column_band) in cells],
+        default=0,
+    )
+
+    not_enough_data = set()
+    for asterisk_x, asterisk_y in asterisks_positions:
+        cell_y = asterisk_y // LINE_BAND
+        cell_x = asterisk_x // COLUMN_BAND
+        nearest = None
+        ring = 0
+        while ring <= max_ring + max(abs(cell_y), abs(cell_x)):
+            for cell in _ring_cells(cell_y, cell_x, ring):
+                for order, col, col_x, col_y in cells.get(cell, []):
+                    if col in not_enough_data:
+                        continue
+                    distance = (asterisk_x - col_x) ** 2 + (asterisk_y - col_y) ** 2
+                    if nearest is None or (distance, order) < nearest[:2]:
+                        nearest = (distance, order, col)
+            if nearest and nearest[0] <= (ring * min_band) ** 2:
+                break
+            ring += 1
+        if nearest:
+            not_enough_data.add(nearest[2])
+
+    return not_enough_data
+
+
+def assign_asterisks_to_columns_numpy(columns_positions, asterisks_positions):
+    """NumPy version of `assign_asterisks_to_columns()`.
+
+    The distances between every asterisk and column are computed at once as
+    a matrix. The assignment is still greedy, in the asterisks' order, but
+    each step is a single `argmin` over a row of the matrix, where columns
+    already assigned are masked out. As `argmin` returns the first minimum,
+    ties are broken by the columns' order.
+    """
+    if not columns_positions or not asterisks_positions:
+        return set()
+
+    columns = list(columns_positions)
+    columns_xy = numpy.array(list(columns_positions.values()), dtype=numpy.int64)
+    asterisks_xy = numpy.array(asterisks_positions, dtype=numpy.int64)
+    distances = ((asterisks_xy[:, numpy.newaxis, :] - columns_xy) ** 2).sum(axis=2)
+
+    unassigned = numpy.ones(len(columns), dtype=bool)
+    for row in distances:
+        if not unassigned.any():
+            break
+        nearest = numpy.where(unassigned, row, numpy.iinfo(row.dtype).max).argmin()
+        unassigned[nearest] = False
+
+    return {column for (column, free) in zip(columns, unassigned) if not free}
+
+
+BACKENDS = {
+    "python": assign_asterisks_to_columns,
+    "numpy": assign_asterisks_to_columns_numpy,
+}
+
+
+def get_backend(name):
+    """Returns the function that assigns asterisks to columns for a backend."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', use one of: {', '.join(BACKENDS)}")
+    if name == "numpy" and numpy is None:
+        raise ImportError("The numpy backend requires NumPy to be installed")
+    return BACKENDS[name]
+
+
+def _ring_cells(cell_y, cell_x, ring):
+    if ring == 0:
+        yield (cell_y, cell_x)
+        return
+    for dx in range(-ring, ring + 1):
+        yield (cell_y - ring, cell_x + dx)
+        yield (cell_y + ring, cell_x + dx)
+    for dy in range(-ring + 1, ring):
+        yield (cell_y + dy, cell_x - ring)
+        yield (cell_y + dy, cell_x + ring)
@@ -0,0 +1,99 @@
+from .mobility_row import CATEGORIES, MobilityRow
+from . import binary_dataset
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Panel:
+    """Rows pivoted into a dense (entity, report date, category) cube.
+
+    The entities are the (region, subregion) pairs, with None as the overall
+    rows' subregion, and the dates are sorted. `values` has the same floats
+    written to the CSV (e.g. -0.71), or NaN where there's no data, and
+    `missing` is True in the same cells.
+    """
+
+    def __init__(self, entities, dates, values, missing):
+        self.entities = entities
+        self.dates = dates
+        self.values = values
+        self.missing = missing
+        self.categories = CATEGORIES
+        self._entity_ids = {entity: index for (index, entity) in enumerate(entities)}
+
+    def entity(self, region, subregion=None):
+        """Returns the index of an entity in the first axis."""
+        return self._entity_ids[(region, subregion)]
+
+    def changes(self, periods=1):
+        """Returns the change of every entity and category from each report
+        date to the one `periods` dates after it, and its missing mask.
+
+        With weekly reports, it's the week-over-week change. The arrays have
+        `periods` dates less than the panel, and are indexed by the later
+        date.
+        """
+        changes = self.values[:, periods:] - self.values[:, :-periods]
+        missing = self.missing[:, periods:] | self.missing[:, :-periods]
+        return changes, missing
+
+
+def build_panel(rows):
+    """Builds a Panel from MobilityRow records, parsed row dicts, or a
+    `binary_dataset.BinaryDataset`.
+
+    The entities and dates are dictionary-encoded into integer ids, and the
+    values are scattered into the cube in a single assignment. There should be
+    a single row for each entity and date, otherwise any of them is kept.
+    """
+    _check_numpy()
+    if isinstance(rows, binary_dataset.BinaryDataset):
+        dataset = rows
+    else:
+        dataset = binary_dataset.BinaryDataset.from_rows(
+            row if isinstance(row, MobilityRow) else MobilityRow.from_dict(row)
+            for row in rows
+        )
+
+    # The overall rows' subregion id is -1, the last name.
+    names = numpy.array([*dataset.strings, None], dtype=object)
+    entity_keys = numpy.stack([dataset.region, dataset.subregion], axis=1)
+    unique_keys, entity_ids = numpy.unique(entity_keys, axis=0, return_inverse=True)
+    unique_days, date_ids = numpy.unique(dataset.updated_at, return_inverse=True)
+    entity_ids = entity_ids.reshape(-1)
+
+    entities = [
+        (names[region], names[subregion]) for (region, subregion) in unique_keys
+    ]
+    order = sorted(
+        range(len(entities)), key=lambda index: _entity_sort_key(entities[index])
+    )
+    ranks = numpy.empty(len(order), dtype=numpy.intp)
+    ranks[order] = numpy.arange(len(order))
+
+    shape = (len(entities), len(unique_days), len(CATEGORIES))
+    values = numpy.full(shape, numpy.nan)
+    raw_values = numpy.asarray(dataset.values)
+    is_null = raw_values == binary_dataset.NULL
+    values[ranks[entity_ids], date_ids] = numpy.where(
+        is_null, numpy.nan, raw_values / 100
+    )
+
+    return Panel(
+        [entities[index] for index in order],
+        [binary_dataset.day_to_date(int(day)) for day in unique_days],
+        values,
+        numpy.isnan(values),
+    )
+
+
+def _entity_sort_key(entity):
+    return (entity[0], entity[1] or "")
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError("The panel requires NumPy to be installed")
@@ -0,0 +1,154 @@
+import collections
+import gzip
+import hashlib
+import importlib
+import json
+import os
+from .mobility_row import MobilityRow
+from .text_cache import file_sha256, write_atomically
+
+PARSER_MODULES = (
+    "mobility_reports.report_parser",
+    "mobility_reports.report_document",
+    "mobility_reports.not_enough_data",
+    "mobility_reports.template_to_regexp",
+    "mobility_reports.mobility_row",
+)
+
+
+def parser_version():
+    """Returns a fingerprint of the parser's source code.
+
+    Any change to the modules used to parse the reports changes it, which
+    invalidates the rows parsed by previous versions.
+    """
+    sha256 = hashlib.sha256()
+    for module_name in PARSER_MODULES:
+        module = importlib.import_module(module_name)
+        with open(module.__file__, "rb") as fp:
+            sha256.update(fp.read())
+    return sha256.hexdigest()
+
+
+class FileHashes:
+    """Remembers the SHA-256 of files, by their path, size and mtime.
+
+    Files with the same size and mtime as the last time they were hashed are
+    assumed unchanged, and only the others are read and hashed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stats = collections.Counter()
+        try:
+            with open(path, "rt") as fp:
+                self._hashes = json.load(fp)
+        except FileNotFoundError:
+            self._hashes = {}
+
+    def sha256(self, file_path):
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        known = self._hashes.get(key)
+        if known and known[:2] == [stat.st_mtime_ns, stat.st_size]:
+            self.stats["unchanged"] += 1
+            return known[2]
+
+        self.stats["hashed"] += 1
+        sha256 = file_sha256(file_path)
+        self._hashes[key] = [stat.st_mtime_ns, stat.st_size, sha256]
+        return sha256
+
+    def save(self):
+        data = json.dumps(self._hashes, sort_keys=True).encode("utf-8")
+        write_atomically(self.path, data)
+
+
+class ReportKeys:
+    """Remembers the (region, updated_at) read from the header of each report,
+    by its path, size and mtime, like FileHashes.
+
+    Reports with the same size and mtime as the last time their header was
+    read are assumed unchanged, so their first page isn't extracted again. A
+    key is None if the header couldn't be parsed. The keys are discarded when
+    the parser version changes.
+    """
+
+    def __init__(self, path, version=None):
+        self.path = path
+        self.version = parser_version() if version is None else version
+        self.stats = collections.Counter()
+        try:
+            with open(path, "rt") as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            data = {}
+        self._keys = data.get("keys", {}) if data.get("version") == self.version else {}
+
+    def get(self, report_path):
+        """Returns a (found, key) tuple."""
+        stat = os.stat(report_path)
+        known = self._keys.get(os.path.abspath(report_path))
+        if not known or known[:2] != [stat.st_mtime_ns, stat.st_size]:
+            self.stats["misses"] += 1
+            return False, None
+
+        self.stats["hits"] += 1
+        return True, None if known[2] is None else tuple(known[2])
+
+    def put(self, report_path, key):
+        stat = os.stat(report_path)
+        self._keys[os.path.abspath(report_path)] = [stat.st_mtime_ns, stat.st_size, key]
+
+    def save(self):
+        data = {"version": self.version, "keys": self._keys}
+        write_atomically(self.path, json.dumps(data, sort_keys=True).encode("utf-8"))
+
+
+class ParseCache:
+    """On-disk cache of the rows parsed from each report.
+
+    The entries are keyed by the SHA-256 of the PDF and the parser version,
+    so a report is only parsed again if it or the parser changed. Reports
+    that couldn't be parsed are cached as well, so they're skipped.
+
+    Unlike TextCache, it must be used from a single process.
+    """
+
+    def __init__(self, directory, version=None):
+        self.directory = directory
+        self.version = parser_version() if version is None else version
+        self.file_hashes = FileHashes(os.path.join(directory, "files.json"))
+        self.stats = collections.Counter()
+
+    def __contains__(self, report_path):
+        return os.path.exists(self.path(report_path))
+
+    def get(self, report_path):
+        """Returns a (found, rows) tuple. The rows are None if the report
+        couldn't be parsed."""
+        try:
+            with gzip.open(self.path(report_path), "rt", encoding="utf-8") as fp:
+                rows = json.load(fp)
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return False, None
+
+        self.stats["hits"] += 1
+        if rows is None:
+            return True, None
+        return True, [MobilityRow.from_dict(row) for row in rows]
+
+    def put(self, report_path, rows):
+        if rows is not None:
+            rows = [row.as_dict() for row in rows]
+        data = json.dumps(rows).encode("utf-8")
+        write_atomically(self.path(report_path), gzip.compress(data))
+
+    def path(self, report_path):
+        key = f"{self.file_hashes.sha256(report_path)}:{self.version}"
+        key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "rows", key[:2], f"{key}.json.gz")
+
+    def save(self):
+        self.file_hashes.save()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import urllib.parse
+from .text_cache import write_atomically
+
+MANIFEST = "manifest.json"
+
+
+def partition_path(region, updated_at, extension):
+    """Returns the path of a partition, relative to the output directory, as
+    `region=<name>/updated_at=<date>/part.<extension>`. The region names are
+    URL quoted, so they're valid directory names."""
+    return os.path.join(
+        f"region={urllib.parse.quote(region, safe=' ')}",
+        f"updated_at={updated_at}",
+        f"part.{extension}",
+    )
+
+
+def write_partitions(reports, directory, write_partition, extension):
+    """Writes the rows of each report, an iterable of lists of tuples, to
+    their (region, updated_at) partition as soon as the report is parsed.
+
+    `write_partition(path, rows)` writes the rows of a partition to a file.
+    Each file is written to a temporary path and renamed, so readers never see
+    it partially written. The manifest lists every partition in the directory,
+    including the ones written by previous runs, and is updated at the end.
+    """
+    manifest = read_manifest(directory)
+    partitions = {
+        (partition["region"], partition["updated_at"]): partition
+        for partition in manifest["partitions"]
+    }
+
+    for rows in reports:
+        for (key, partition_rows) in _group_by_partition(rows).items():
+            path = partition_path(*key, extension)
+            _write_partition_atomically(
+                os.path.join(directory, path), partition_rows, write_partition
+            )
+            partitions[key] = {
+                "region": key[0],
+                "updated_at": key[1],
+                "path": path,
+                "rows": len(partition_rows),
+            }
+
+    manifest["partitions"] = [partitions[key] for key in sorted(partitions)]
+    data = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+    write_atomically(os.path.join(directory, MANIFEST), data)
+    return manifest
+
+
+def read_manifest(directory):
+    """Returns the manifest of a partitioned directory, an empty one if it
+    doesn't exist."""
+    try:
+        with open(os.path.join(directory, MANIFEST), "rt", encoding="utf-8") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {"partitions": []}
+
+
+def _group_by_partition(rows):
+    partitions = {}
+    for row in rows:
+        partitions.setdefault((row[0], row[2]), []).append(row)
+    return partitions
+
+
+def _write_partition_atomically(path, rows, write_partition):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    (fd, tmp_path) = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write_partition(tmp_path, rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,141 @@
+import bisect
+from .template_to_regexp import compile_regexp
+
+
+class ReportDocument:
+    """Text extracted from a report, normalized once.
+
+    Most of the report is parsed on a clean version of the text, stripped and
+    with repeated newlines and spaces collapsed. This keeps both versions
+    together with a map between their offsets, so a report is normalized only
+    once, no matter how many fields are extracted from it.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.clean_text, self._clean_offsets, self._raw_offsets = _normalize(text)
+        self.index = PageIndex(text)
+
+    @classmethod
+    def from_text(cls, text):
+        """Returns `text` itself if it's already a ReportDocument."""
+        if isinstance(text, cls):
+            return text
+        return cls(text)
+
+    def to_clean_offset(self, raw_offset):
+        """Maps an offset in the raw text to the clean text.
+
+        Offsets inside a collapsed whitespace run map to its single kept
+        character, and offsets in the stripped leading whitespace map to 0.
+        """
+        index = bisect.bisect_right(self._raw_offsets, raw_offset) - 1
+        if index < 0:
+            return 0
+        clean_offset = (
+            self._clean_offsets[index] + raw_offset - self._raw_offsets[index]
+        )
+        if index + 1 < len(self._clean_offsets):
+            clean_offset = min(clean_offset, self._clean_offsets[index + 1] - 1)
+        return clean_offset
+
+    def to_raw_offset(self, clean_offset):
+        """Maps an offset in the clean text to the raw text."""
+        index = bisect.bisect_right(self._clean_offsets, clean_offset) - 1
+        return self._raw_offsets[index] + clean_offset - self._clean_offsets[index]
+
+
+class PageIndex:
+    """Offsets of the pages and lines in the text extracted from a report.
+
+    `pdftotext` separates pages with form feeds (\\x0c). The page and line
+    start offsets are kept in sorted lists, so finding the page and line of
+    an offset is a binary search. Lines are split like `str.splitlines()`,
+    so form feeds also end lines.
+    """
+
+    def __init__(self, text):
+        self.length = len(text)
+        self.page_starts = [0]
+        self.line_starts = [0]
+        self.line_ends = []
+        for match in _LINE_BREAK_REGEXP.finditer(text):
+            self.line_ends.append(match.start())
+            self.line_starts.append(match.end())
+            if match.group() == "\x0c":
+                self.page_starts.append(match.end())
+        self.line_ends.append(self.length)
+
+    def locate(self, offset):
+        """Returns the (page, line, column) of an offset, all zero-based."""
+        page = bisect.bisect_right(self.page_starts, offset) - 1
+        line = bisect.bisect_right(self.line_starts, offset) - 1
+        return page, line, offset - self.line_starts[line]
+
+    def page_lines(self, page):
+        """Returns the range of line numbers in a page."""
+        first_line = bisect.bisect_left(self.line_starts, self.page_starts[page])
+        if page + 1 < len(self.page_starts):
+            last_line = bisect.bisect_left(self.line_starts, self.page_starts[page + 1])
+        else:
+            last_line = len(self.line_starts)
+        return range(first_line, last_line)
+
+    def next_page_break(self, offset):
+        """Equivalent to `text.find("\\x0c", offset)`."""
+        page = bisect.bisect_right(self.page_starts, offset) - 1
+        if page + 1 < len(self.page_starts):
+            return self.page_starts[page + 1] - 1
+        return -1
+
+    def line_spans(self, start, end):
+        """Returns the (start, end) offsets of each line in text[start:end].
+
+        The spans are clipped to the given range and exclude the line breaks,
+        matching `text[start:end].splitlines()`.
+        """
+        if start >= end:
+            return []
+        first_line = bisect.bisect_right(self.line_starts, start) - 1
+        last_line = bisect.bisect_right(self.line_starts, end - 1) - 1
+        return [
+            self.line_span(line, start, end)
+            for line in range(first_line, last_line + 1)
+        ]
+
+    def line_span(self, line, start, end):
+        """Returns the (start, end) offsets of a line, clipped to a range."""
+        line_start = max(self.line_starts[line], start)
+        line_end = max(min(self.line_ends[line], end), line_start)
+        return line_start, line_end
+
+
+_LINE_BREAK_REGEXP = compile_regexp("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+_COLLAPSIBLE_WHITESPACE_REGEXP = compile_regexp("\n\n+|  +")
+
+
+def _normalize(text):
+    """Strips the text and collapses repeated newlines and spaces.
+
+    Returns the clean text and two sorted lists with the offsets where each
+    contiguous chunk of the clean text starts, both in the clean and in the
+    raw text.
+    """
+    stripped = text.strip()
+    raw_offset = len(text) - len(text.lstrip())
+
+    chunks = []
+    clean_offsets = [0]
+    raw_offsets = [raw_offset]
+    clean_offset = 0
+    previous_end = 0
+    for match in _COLLAPSIBLE_WHITESPACE_REGEXP.finditer(stripped):
+        chunk = stripped[previous_end : match.start() + 1]
+        chunks.append(chunk)
+        clean_offset += len(chunk)
+        previous_end = match.end()
+        clean_offsets.append(clean_offset)
+        raw_offsets.append(raw_offset + previous_end)
+    chunks.append(stripped[previous_end:])
+
+    return "".join(chunks), clean_offsets, raw_offsets
@@ -1,29 +1,92 @@
 import re
-import math
 import datetime
-from . import template_to_regexp
+from .template_to_regexp import compile_template, compile_regexp
+from .report_document import ReportDocument
+from .not_enough_data import MarkersIndex, get_backend
+from . import text_cache
 
 
 class ReportParser:
+    """Parses the text extracted from a report with `pdftotext -layout`.
+
+    Every method accepts either the text or a ReportDocument built from it.
+    Passing the same ReportDocument to several methods avoids normalizing the
+    text more than once.
+
+    The `backend` is used to match the "not enough data" asterisks to their
+    columns. It can be "python" or "numpy", which is faster on large batches
+    but requires NumPy.
+    """
+
+    REGION_AND_DATE_REGEXP = compile_template(
+        """
+COVID-19 Community Mobility Report
+{region_and_date}
+Mobility changes
+        """.strip()
+    )
+    OVERALL_VALUE_REGEXP = compile_regexp(r"^(\S+)%", re.MULTILINE)
+    SUBREGION_HEADER_REGEXP = compile_regexp(r"\nRetail \& recreation")
+    SUBREGION_VALUE_REGEXP = compile_regexp(
+        r"""((?P<data>-?\d+)% compared to baseline|Not enough data for this date[^:])"""
+    )
+    NON_WHITESPACE_REGEXP = compile_regexp(r"\S")
+
+    def __init__(self, backend="python"):
+        self.backend = backend
+        self._assign_asterisks_to_columns = get_backend(backend)
+
     def parse(self, text):
-        region = self.parse_region(text)
-        updated_at = self.parse_date(text)
-        overall = self.parse_overall_mobility_changes(text)
-        subregions = self.parse_subregions(text)
+        return list(self.iter_rows(text))
 
-        region_and_subregions = [overall] + subregions
-        for row in region_and_subregions:
-            row["region"] = region
-            row["updated_at"] = updated_at
+    def iter_rows(self, text):
+        """Yields the report's rows as soon as each one is parsed.
+
+        The first row has the overall mobility changes of the region, and the
+        others the changes of each subregion, in the order they appear in the
+        report. As the rows are yielded before the whole report is parsed, a
+        parsing error can happen after some rows were already yielded.
+        """
+        document = ReportDocument.from_text(text)
+        region, updated_at = self._parse_region_and_date(document)
+        header = {"region": region, "updated_at": updated_at}
 
-        return region_and_subregions
+        yield {**header, **self.parse_overall_mobility_changes(document)}
+        for subregion in self.iter_subregions(document):
+            yield {**header, **subregion}
+
+    def probe(self, report_path):
+        """Returns the region, updated_at, page count and content hash (the
+        SHA-256 of the file) of a report PDF.
+
+        Only the first page is extracted and normalized, as it's the only one
+        with the header. The region and updated_at are None if the header
+        can't be parsed.
+        """
+        text = text_cache.pdftotext(report_path, first_page=1, last_page=1)
+        region, updated_at = self.parse_header(text) or (None, None)
+        return {
+            "region": region,
+            "updated_at": updated_at,
+            "page_count": text_cache.pdf_page_count(report_path),
+            "content_hash": text_cache.file_sha256(report_path),
+        }
+
+    def parse_header(self, text):
+        """Returns the report's (region, updated_at), or None if the header is
+        missing or malformed. The header is on the first page, so the text of
+        that page is enough."""
+        try:
+            return self._parse_region_and_date(ReportDocument.from_text(text))
+        except ValueError:
+            return
 
     def parse_region(self, text):
-        region, _ = self._parse_region_and_date(text)
+        region, _ = self._parse_region_and_date(ReportDocument.from_text(text))
         return region
 
     def parse_date(self, text):
-        _, date = self._parse_region_and_date(text)
+        _, date = self._parse_region_and_date(ReportDocument.from_text(text))
         return date
 
     def parse_overall_mobility_changes(self, text):
@@ -35,60 +98,88 @@ class ReportParser:
             "workplaces",
             "residential",
         ]
-        subset_index = text.find("Mobility trends for places of residence")
-        subset_index = text.find("\x0c", subset_index)
-        region_report_pages = text[:subset_index]
-        values = re.findall(r"^(\S+)%", region_report_pages, re.MULTILINE)
+        document = ReportDocument.from_text(text)
+        subset_index = document.text.find("Mobility trends for places of residence")
+        if subset_index != -1:
+            subset_index = document.index.next_page_break(subset_index)
+        region_report_pages = document.text[:subset_index]
+        values = self.OVERALL_VALUE_REGEXP.findall(region_report_pages)
 
         data = {key: int(value) / 100 for (key, value) in zip(keys, values)}
         return data
 
     def parse_subregions(self, text):
-        subregions = []
+        return list(self.iter_subregions(text))
+
+    def iter_subregions(self, text):
+        document = ReportDocument.from_text(text)
 
         # Skip first pages that don't have region data.
-        index = text.find("Mobility trends for places of residence")
-        if index != -1:
-            text_subset = text[index:]
-        else:
-            text_subset = text
-
-        subregion = self._parse_first_subregion(text_subset)
-
-        while subregion:
-            subregions.append(subregion)
-            next_subset_index = text_subset.find(subregion["subregion"]) + len(
-                subregion["subregion"]
-            )
-            text_subset = text_subset[next_subset_index:]
-            subregion = self._parse_first_subregion(text_subset)
+        position = max(document.text.find("Mobility trends for places of residence"), 0)
 
-        return subregions
+        markers_index = MarkersIndex(document)
+        parsed = self._parse_next_subregion(document, position, markers_index)
+        while parsed:
+            subregion, position = parsed
+            yield subregion
+            parsed = self._parse_next_subregion(document, position, markers_index)
 
-    def _parse_first_subregion(self, text):
-        regexp = r"""
-(?P<subregion>[^\*\n]+)[\n]*?
-Retail \& recreation
-        """.strip()
-        data = _extract_groups_from_regexp(regexp, text)
-        if not data:
+    def _parse_next_subregion(self, document, position, markers_index=None):
+        """Parses the first subregion block starting at `position`.
+
+        Returns the subregion data and the position where the search for the
+        next block should continue, or None if there are no more subregions.
+        """
+        text = document.text
+        start = self.NON_WHITESPACE_REGEXP.search(text, position)
+        if not start:
+            return
+
+        subregion = self._search_subregion_name(
+            document.clean_text, document.to_clean_offset(start.start())
+        )
+        if not subregion:
             return
+        data = {"subregion": subregion}
 
-        index = text.find(data["subregion"])
+        index = text.find(data["subregion"], position)
         if index == -1:
             raise ValueError("Could not parse")
 
-        text_subset = text[index:]
         data["subregion"] = data["subregion"].strip()
-        data.update(self._extract_subregion_values(text_subset))
-        not_enough = self._extract_subregion_not_enough_data_markers(text_subset)
+        data.update(self._extract_subregion_values(text, index))
+        not_enough = self._extract_subregion_not_enough_data_markers(
+            document, index, markers_index
+        )
 
         for not_enough_column in not_enough:
             data[f"{not_enough_column}_not_enough_data"] = True
 
-        return data
+        next_position = text.find(data["subregion"], position) + len(data["subregion"])
+        return data, next_position
+
+    def _search_subregion_name(self, clean_text, position):
+        """Finds the first subregion name in the clean text after `position`.
 
-    def _extract_subregion_values(self, text):
+        This is equivalent to searching for the regexp
+        `(?P<subregion>[^\\*\\n]+)[\\n]*?\\nRetail \\& recreation`, but anchors on
+        the "Retail & recreation" line and only then looks back for the name in
+        the previous line. The regexp would try every character as a starting
+        point, backtracking over the whole line each time.
+        """
+        match = self.SUBREGION_HEADER_REGEXP.search(clean_text, position + 1)
+        while match:
+            end = match.start()
+            start = max(
+                position,
+                clean_text.rfind("\n", position, end) + 1,
+                clean_text.rfind("*", position, end) + 1,
+            )
+            if start < end:
+                return clean_text[start:end]
+            match = self.SUBREGION_HEADER_REGEXP.search(clean_text, end + 1)
+
+    def _extract_subregion_values(self, text, position=0):
         keys = [
             "retail_and_recreation",
             "grocery_and_pharmacy",
@@ -97,15 +188,12 @@ Retail \& recreation
             "workplaces",
             "residential",
         ]
-        data_regexp = r"""((?P<data>-?\d+)% compared to baseline|Not enough data for this date[^:])"""
-
-        text_subset = text
         data = {}
         for key in keys:
-            match = re.search(data_regexp, text_subset)
+            match = self.SUBREGION_VALUE_REGEXP.search(text, position)
             value = None
             if match:
-                text_subset = text_subset[match.end() :]
+                position = match.end()
 
                 try:
                     value = match.groupdict()["data"]
@@ -117,7 +205,9 @@ Retail \& recreation
 
         return data
 
-    def _extract_subregion_not_enough_data_markers(self, text):
+    def _extract_subregion_not_enough_data_markers(
+        self, document, position=0, markers_index=None
+    ):
         """Returns the columns with not enough data indicators.
 
         These columns are marked with an asterisk. As the text extracted from
@@ -129,80 +219,35 @@ Retail \& recreation
           This avoids considering asterisks in the footer of the page or other pages.
         4. Use Euclidian distance to match the asterisk closest to the column names
         5. Return the list of columns with a nearby asterisk
+
+        The column names and asterisks are indexed once per page in
+        `markers_index`, which can be shared by all subregions in the report.
         """
-        columns = {
-            "retail_and_recreation": "Retail & recreation",
-            "grocery_and_pharmacy": "Grocery & pharmacy",
-            "parks": "Parks",
-            "transit_stations": "Transit stations",
-            "workplaces": "Workplace",
-            "residential": "Residential",
-        }
-        columns_positions = {}
-        max_line_length = -1
+        if markers_index is None:
+            markers_index = MarkersIndex(document)
 
         # Only consider text in a single page
-        next_page_break = text[5:].find("\x0c")
-        if next_page_break != -1:
-            text_subset = text[:next_page_break]
-
-        for (y, row) in enumerate(text_subset.splitlines()):
-            if len(row) > max_line_length:
-                max_line_length = len(row)
-            for (key, column) in columns.items():
-                x = row.find(column)
-                if x != -1:
-                    columns_positions[key] = (x + len(column) // 2, y)
-            if len(columns_positions) == len(columns):
-                break
-
-        asterisks_positions = []
-        for (y, row) in enumerate(text_subset.splitlines()):
-            x = row.find("*")
-            while x != -1:
-                asterisks_positions.append((x, y))
-                row = row[x + 1 :]
-                x = row.find("*")
+        next_page_break = document.index.next_page_break(position + 5)
+        if next_page_break == -1:
+            next_page_break = len(document.text) + 5
+        end = next_page_break - 5
+        columns_positions = markers_index.find_columns(position, end)
 
         # Filter only asterisks that are near our columns to avoid
         # using other asterisks on the page.
         min_y = min([y for (key, (x, y)) in columns_positions.items()])
         max_y = max([y for (key, (x, y)) in columns_positions.items()]) + 5
-        asterisks_candidates = [
-            (x, y) for (x, y) in asterisks_positions if y >= min_y and y <= max_y
-        ]
+        asterisks_candidates = markers_index.find_asterisks(position, end, min_y, max_y)
 
-        not_enough_data = set()
-        for (asterisk_x, asterisk_y) in asterisks_candidates:
-            if asterisk_y < min_y or asterisk_y > max_y:
-                # Avoid parsing asterisks not related to this region
-                continue
-            nearest_column_distance = float("inf")
-            nearest_column = None
-            for (col, (col_x, col_y)) in columns_positions.items():
-                if col in not_enough_data:
-                    continue
-
-                distance = math.sqrt(
-                    (asterisk_x - col_x) ** 2 + (asterisk_y - col_y) ** 2
-                )
-                if distance < nearest_column_distance:
-                    nearest_column_distance = distance
-                    nearest_column = col
-            if nearest_column:
-                not_enough_data.add(nearest_column)
-
-        return not_enough_data
-
-    def _parse_region_and_date(self, text):
-        template = """
-COVID-19 Community Mobility Report
-{region_and_date}
-Mobility changes
-        """.strip()
-        data = _extract_groups_from_template(template, text)
-        if not data:
+        return self._assign_asterisks_to_columns(
+            columns_positions, asterisks_candidates
+        )
+
+    def _parse_region_and_date(self, document):
+        match = self.REGION_AND_DATE_REGEXP.search(document.clean_text)
+        if not match:
             return
+        data = match.groupdict()
 
         data_parts = data["region_and_date"].split(" ")
         region = " ".join(data_parts[:-3]).strip()
@@ -211,20 +256,3 @@ Mobility changes
         date = datetime.datetime.strptime(date_str, "%B %d, %Y").date().isoformat()
 
         return region, date
-
-
-def _extract_groups_from_template(template, text):
-    regexp = template_to_regexp(template.strip())
-    clean_text = re.sub("\\n\\n+", "\n", text.strip())
-    clean_text = re.sub("  +", " ", clean_text)
-    match = re.search(regexp, clean_text)
-    if match:
-        return match.groupdict()
-
-
-def _extract_groups_from_regexp(regexp, text):
-    clean_text = re.sub("\\n\\n+", "\n", text.strip())
-    clean_text = re.sub("  +", " ", clean_text)
-    match = re.search(regexp, clean_text)
-    if match:
-        return match.groupdict()
@@ -0,0 +1,111 @@
+import contextlib
+import sqlite3
+from .mobility_row import CATEGORIES
+
+TABLE = "mobility_reports"
+KEY = ("region", "subregion", "updated_at")
+COLUMNS = (
+    *KEY,
+    *CATEGORIES,
+    *[f"{category}_not_enough_data" for category in CATEGORIES],
+)
+TRANSACTION_SIZE = 100000
+
+
+class SQLiteWriter:
+    """Writes rows to a SQLite table with the same columns as the CSV.
+
+    The rows are tuples in the same order as the CSV columns, as returned by
+    `MobilityRow.as_tuple()`. They're bulk inserted into a temporary table
+    without indexes, in transactions of `transaction_size` rows, and only
+    moved to the main table when the writer is closed. The moved rows are
+    sorted by the unique (region, subregion, updated_at) index, and replace
+    any existing rows with the same key, so the database can be updated
+    incrementally.
+
+    Like in the CSV, the subregion of the overall rows is an empty string,
+    so they're unique as well.
+    """
+
+    def __init__(self, path, transaction_size=TRANSACTION_SIZE):
+        self.transaction_size = transaction_size
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute(_create_table_sql(TABLE))
+        self.connection.execute(_create_table_sql(f"temp.{TABLE}_load"))
+        self._buffer = []
+
+    def write_rows(self, rows):
+        self._buffer += rows
+        if len(self._buffer) >= self.transaction_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        rows = [(row[0], row[1] or "", *row[2:]) for row in self._buffer]
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self._transaction():
+            self.connection.executemany(
+                f"INSERT INTO temp.{TABLE}_load VALUES ({placeholders})", rows
+            )
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        columns = ", ".join(COLUMNS)
+        updates = ", ".join(
+            f"{column} = excluded.{column}" for column in COLUMNS if column not in KEY
+        )
+        with self._transaction():
+            self.connection.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {TABLE}_key "
+                f"ON {TABLE} ({', '.join(KEY)})"
+            )
+            self.connection.execute(
+                f"INSERT INTO {TABLE} ({columns}) "
+                f"SELECT {columns} FROM temp.{TABLE}_load "
+                f"ORDER BY {', '.join(KEY)}, rowid "
+                f"ON CONFLICT ({', '.join(KEY)}) DO UPDATE SET {updates}"
+            )
+            self.connection.execute(f"DROP TABLE temp.{TABLE}_load")
+        self.connection.execute("PRAGMA synchronous = FULL")
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the main table as it was.
+            self.connection.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+
+def write_reports(reports, path, transaction_size=TRANSACTION_SIZE):
+    """Writes the rows of each report, an iterable of lists of tuples, as
+    they're parsed."""
+    with SQLiteWriter(path, transaction_size) as writer:
+        for rows in reports:
+            writer.write_rows(rows)
+
+
+def _create_table_sql(table):
+    types = {column: "TEXT NOT NULL" for column in KEY}
+    types.update({category: "REAL" for category in CATEGORIES})
+    columns = ", ".join(
+        f"{column} {types.get(column, 'INTEGER')}" for column in COLUMNS
+    )
+    return f"CREATE TABLE IF NOT EXISTS {table} ({columns})"
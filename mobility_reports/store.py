@@ -0,0 +1,206 @@
+import array
+import bisect
+import csv
+import datetime
+import functools
+import json
+import os
+import sqlite3
+from .mobility_row import CATEGORIES, MobilityRow
+from . import binary_dataset, partitions
+
+NULL = binary_dataset.NULL
+EPOCH = binary_dataset.EPOCH
+
+
+class MobilityStore:
+    """Rows kept in typed columns, indexed by region, subregion and date.
+
+    The rows are sorted by region, subregion and date, so the rows of each
+    region, and of each subregion in it, are contiguous. A hash index maps
+    them to their (start, end) row range, and the dates of each range are
+    sorted, so they're sliced with a binary search. Another index keeps every
+    row sorted by date, for the slices across all regions.
+
+    The columns are like the arrays of `binary_dataset.BinaryDataset`, but in
+    `array.array`s, so they don't need NumPy.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=MobilityRow.sort_key)
+        self.strings = []
+        string_ids = {}
+        self.region = array.array("i")
+        self.subregion = array.array("i")
+        self.updated_at = array.array("i")
+        self.values = [array.array("h") for _ in CATEGORIES]
+        self.not_enough_data = array.array("B")
+        self._ranges = {}
+        self._regions = {}
+
+        for index, row in enumerate(rows):
+            for name in (row.region, row.subregion):
+                if name is not None and name not in string_ids:
+                    string_ids[name] = len(self.strings)
+                    self.strings.append(name)
+            self.region.append(string_ids[row.region])
+            self.subregion.append(
+                -1 if row.subregion is None else string_ids[row.subregion]
+            )
+            self.updated_at.append(_to_day(row.updated_at))
+            for column, category in enumerate(CATEGORIES):
+                value = getattr(row, category)
+                self.values[column].append(value if isinstance(value, int) else NULL)
+            self.not_enough_data.append(row.not_enough_data)
+
+            _extend_range(self._ranges, (row.region, row.subregion), index)
+            _extend_range(self._regions, row.region, index)
+
+        self._date_order = sorted(
+            range(len(rows)), key=lambda index: self.updated_at[index]
+        )
+        self._sorted_dates = array.array(
+            "i", (self.updated_at[index] for index in self._date_order)
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads a file in any of the CLI's output formats: CSV, JSON Lines,
+        Parquet, an Arrow IPC stream, SQLite, a NumPy dataset directory, or a
+        partitioned directory."""
+        return cls(read_rows(path))
+
+    def __len__(self):
+        return len(self.region)
+
+    def row(self, index):
+        values = {}
+        for column, category in enumerate(CATEGORIES):
+            value = self.values[column][index]
+            values[category] = None if value == NULL else value
+        subregion = self.subregion[index]
+        return MobilityRow(
+            self.strings[self.region[index]],
+            None if subregion == -1 else self.strings[subregion],
+            _from_day(self.updated_at[index]),
+            self.not_enough_data[index],
+            **values,
+        )
+
+    def get(self, region, subregion=None, since=None, until=None):
+        """Returns the rows of a region (or of one of its subregions) sorted
+        by date, optionally only the ones from `since` to `until`, inclusive.
+        """
+        start, end = self._ranges.get((region, subregion), (0, 0))
+        if since is not None:
+            start = bisect.bisect_left(self.updated_at, _to_day(since), start, end)
+        if until is not None:
+            end = bisect.bisect_right(self.updated_at, _to_day(until), start, end)
+        return [self.row(index) for index in range(start, end)]
+
+    def get_region(self, region):
+        """Returns the rows of a region and all its subregions, sorted by
+        subregion and date, the overall rows first."""
+        start, end = self._regions.get(region, (0, 0))
+        return [self.row(index) for index in range(start, end)]
+
+    def subregions(self, region):
+        """Returns the names of a region's subregions, sorted."""
+        start, end = self._regions.get(region, (0, 0))
+        names = []
+        for index in range(start, end):
+            subregion = self.subregion[index]
+            if subregion != -1 and (not names or names[-1] != self.strings[subregion]):
+                names.append(self.strings[subregion])
+        return names
+
+    def regions(self):
+        return list(self._regions)
+
+    def between(self, since=None, until=None):
+        """Returns the rows from `since` to `until`, inclusive, sorted by date."""
+        start = 0
+        end = len(self._sorted_dates)
+        if since is not None:
+            start = bisect.bisect_left(self._sorted_dates, _to_day(since))
+        if until is not None:
+            end = bisect.bisect_right(self._sorted_dates, _to_day(until))
+        return [self.row(index) for index in self._date_order[start:end]]
+
+
+def read_rows(path):
+    """Yields the MobilityRow records in a file written by the CLI, by its
+    format, guessed from its extension. Directories are either partitioned,
+    and read through their manifest, or NumPy datasets."""
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, partitions.MANIFEST)):
+            for partition in partitions.read_manifest(path)["partitions"]:
+                yield from read_rows(os.path.join(path, partition["path"]))
+        else:
+            yield from binary_dataset.load(path).rows()
+        return
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".jsonl":
+        with open(path, "rt", encoding="utf-8") as fp:
+            for line in fp:
+                yield MobilityRow.from_dict(json.loads(line))
+    elif extension == ".parquet":
+        import pyarrow.parquet
+
+        yield from _from_arrow_table(pyarrow.parquet.read_table(path))
+    elif extension in (".arrow", ".arrows"):
+        import pyarrow.ipc
+
+        with open(path, "rb") as fp:
+            yield from _from_arrow_table(pyarrow.ipc.open_stream(fp).read_all())
+    elif extension in (".db", ".sqlite", ".sqlite3"):
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        try:
+            for row in connection.execute("SELECT * FROM mobility_reports"):
+                yield _from_typed_row(dict(row))
+        finally:
+            connection.close()
+    else:
+        with open(path, "rt", newline="") as fp:
+            for row in csv.DictReader(fp):
+                yield _from_csv_row(row)
+
+
+def _from_arrow_table(table):
+    for row in table.to_pylist():
+        row["updated_at"] = row["updated_at"].isoformat()
+        yield _from_typed_row(row)
+
+
+def _from_csv_row(row):
+    typed_row = {key: row[key] for key in ("region", "subregion", "updated_at")}
+    for category in CATEGORIES:
+        value = row[category]
+        typed_row[category] = float(value) if value else None
+        flag = f"{category}_not_enough_data"
+        typed_row[flag] = row[flag] == "True"
+    return _from_typed_row(typed_row)
+
+
+def _from_typed_row(row):
+    row = {key: value for (key, value) in row.items() if value is not False}
+    if not row.get("subregion"):
+        row.pop("subregion", None)
+    return MobilityRow.from_dict(row)
+
+
+def _extend_range(ranges, key, index):
+    start, _ = ranges.get(key, (index, index))
+    ranges[key] = (start, index + 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _to_day(date):
+    return (datetime.date.fromisoformat(date) - EPOCH).days
+
+
+@functools.lru_cache(maxsize=None)
+def _from_day(day):
+    return (EPOCH + datetime.timedelta(days=day)).isoformat()
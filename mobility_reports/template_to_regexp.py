@@ -1,4 +1,10 @@
 import re
+import collections
+import functools
+
+# Number of patterns compiled by `compile_template()` and `compile_regexp()`,
+# by kind. Useful to check no patterns are being compiled while parsing.
+compile_counts = collections.Counter()
 
 
 def template_to_regexp(template):
@@ -11,3 +17,21 @@ def template_to_regexp(template):
     converted = re.sub(groups_regexp, "(?P<\\1>.+)", converted)
 
     return converted
+
+
+@functools.lru_cache(maxsize=128)
+def compile_template(template, flags=0):
+    """Returns the compiled regexp of a template.
+
+    The most recently used templates are cached, so they're converted and
+    compiled only once.
+    """
+    compile_counts["template"] += 1
+    return re.compile(template_to_regexp(template), flags)
+
+
+@functools.lru_cache(maxsize=128)
+def compile_regexp(regexp, flags=0):
+    """Returns the compiled regexp, caching the most recently used ones."""
+    compile_counts["regexp"] += 1
+    return re.compile(regexp, flags)
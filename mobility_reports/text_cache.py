@@ -0,0 +1,110 @@
+import collections
+import gzip
+import hashlib
+import os
+import subprocess
+import tempfile
+
+PDFTOTEXT_FLAGS = ("-layout",)
+
+
+def pdftotext(report_path, first_page=None, last_page=None):
+    pages = []
+    if first_page is not None:
+        pages += ["-f", str(first_page)]
+    if last_page is not None:
+        pages += ["-l", str(last_page)]
+    return subprocess.check_output(
+        ["pdftotext", *PDFTOTEXT_FLAGS, *pages, report_path, "-"],
+        universal_newlines=True,
+    )
+
+
+def pdf_page_count(report_path):
+    """Returns the number of pages of a PDF, read by `pdfinfo`."""
+    output = subprocess.check_output(["pdfinfo", report_path], universal_newlines=True)
+    for line in output.splitlines():
+        if line.startswith("Pages:"):
+            return int(line.split(":", 1)[1])
+    raise ValueError(f"Could not read the number of pages of {report_path}")
+
+
+def pdftotext_version():
+    """Returns the first line of `pdftotext -v`, e.g. "pdftotext version 0.86.1"."""
+    output = subprocess.run(
+        ["pdftotext", "-v"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    ).stdout
+    return output.strip().splitlines()[0]
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class TextCache:
+    """On-disk cache of the text extracted from the reports by `pdftotext`.
+
+    The entries are gzipped and keyed by the SHA-256 of the PDF contents, the
+    `pdftotext` version and its flags, so a report is only extracted again if
+    it changed, or if `pdftotext` did. Cache hits don't run `pdftotext` at all.
+
+    Instances can be used as the `extract` function in `cli.parse_reports()`,
+    and are picklable so they can be sent to other processes.
+    """
+
+    def __init__(self, directory, version=None):
+        self.directory = directory
+        self.version = pdftotext_version() if version is None else version
+        self.stats = collections.Counter()
+
+    def __call__(self, report_path):
+        return self.extract(report_path)
+
+    def extract(self, report_path):
+        path = self.path(report_path)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8", newline="") as fp:
+                text = fp.read()
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            text = pdftotext(report_path)
+            write_atomically(path, gzip.compress(text.encode("utf-8")))
+        else:
+            self.stats["hits"] += 1
+        return text
+
+    def path(self, report_path):
+        key = self.key(report_path)
+        return os.path.join(self.directory, "text", key[:2], f"{key}.txt.gz")
+
+    def key(self, report_path):
+        key = ":".join([file_sha256(report_path), self.version, *PDFTOTEXT_FLAGS])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def pop_stats(self):
+        """Returns and resets the hit and miss counts."""
+        stats = self.stats
+        self.stats = collections.Counter()
+        return stats
+
+
+def write_atomically(path, data):
+    """Writes to a temporary file and renames it, so concurrent readers never
+    see partially written entries."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    (fd, tmp_path) = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
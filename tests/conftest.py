@@ -0,0 +1,70 @@
+import pathlib
+import pytest
+from mobility_reports import MobilityRow, ReportParser
+
+
+@pytest.fixture(scope="session")
+def ar_report():
+    return _read_fixture("2020-03-29_AR_Mobility_Report_en.txt")
+
+
+@pytest.fixture(scope="session")
+def br_report():
+    return _read_fixture("2020-03-29_BR_Mobility_Report_en.txt")
+
+
+@pytest.fixture(scope="session")
+def gb_report():
+    return _read_fixture("2020-03-29_GB_Mobility_Report_en.txt")
+
+
+@pytest.fixture(scope="session")
+def cz_report():
+    return _read_fixture("2020-03-29_CZ_Mobility_Report_en.txt")
+
+
+@pytest.fixture(scope="session")
+def us_georgia_report():
+    return _read_fixture("2020-03-29_US_Georgia_Mobility_Report_en.txt")
+
+
+@pytest.fixture(scope="session")
+def kr_report():
+    return _read_fixture("2020-03-29_KR_Mobility_Report_en.txt")
+
+
+@pytest.fixture
+def reports(br_report, us_georgia_report):
+    """The rows of the Georgia and Brazil reports, a list of MobilityRow
+    records per report."""
+    parser = ReportParser()
+    return [
+        [MobilityRow.from_dict(row) for row in parser.parse(report)]
+        for report in (us_georgia_report, br_report)
+    ]
+
+
+@pytest.fixture
+def rows(reports):
+    """The rows of all the `reports`, in order."""
+    return [row for rows in reports for row in rows]
+
+
+@pytest.fixture
+def later_rows(rows):
+    """Copies of the first ten `rows`, from a later report with other parks
+    values."""
+    later_rows = []
+    for row in rows[:10]:
+        later_row = MobilityRow.from_dict(row.as_dict())
+        later_row.updated_at = "2020-04-05"
+        later_row.parks = 10
+        later_rows.append(later_row)
+    return later_rows
+
+
+def _read_fixture(name):
+    path = pathlib.Path(__file__).parent / f"fixtures/{name}"
+    with open(path, "rt") as fp:
+        contents = fp.read()
+    return contents
@@ -0,0 +1,64 @@
+import datetime
+import io
+import pytest
+from mobility_reports import MobilityRow
+from mobility_reports.cli import FIELDNAMES, write_as_arrow
+
+pyarrow = pytest.importorskip("pyarrow")
+import pyarrow.ipc
+import pyarrow.parquet
+from mobility_reports.arrow_writer import ArrowWriter, schema
+
+
+class TestArrowWriter:
+    def test_schema_has_the_csv_columns(self):
+        assert schema().names == FIELDNAMES
+        assert schema().field("region").type == pyarrow.dictionary(
+            pyarrow.int32(), pyarrow.string()
+        )
+        assert schema().field("updated_at").type == pyarrow.date32()
+
+    @pytest.mark.parametrize("format", ("parquet", "arrow"))
+    def test_writes_the_sorted_rows_of_each_report(self, reports, format):
+        output = io.BytesIO()
+        write_as_arrow(iter(reports), output, format)
+
+        table = self._read(output, format)
+        expected_rows = []
+        for rows in reports:
+            expected_rows += sorted(rows, key=MobilityRow.sort_key)
+        assert table.num_rows == len(expected_rows)
+        assert table.column("region").to_pylist() == [
+            row.region for row in expected_rows
+        ]
+        assert table.column("subregion").to_pylist() == [
+            row.subregion for row in expected_rows
+        ]
+        assert table.column("parks").to_pylist() == [
+            row.as_tuple()[FIELDNAMES.index("parks")] for row in expected_rows
+        ]
+        assert table.column("parks_not_enough_data").to_pylist() == [
+            not row.has_enough_data("parks") for row in expected_rows
+        ]
+        assert set(table.column("updated_at").to_pylist()) == {
+            datetime.date(2020, 3, 29)
+        }
+
+    def test_writes_row_groups_as_rows_arrive(self, reports):
+        output = io.BytesIO()
+        with ArrowWriter(output, "parquet", row_group_size=100) as writer:
+            for rows in reports:
+                writer.write_rows([row.as_tuple() for row in rows])
+
+        metadata = pyarrow.parquet.ParquetFile(io.BytesIO(output.getvalue())).metadata
+        assert metadata.num_row_groups == 2
+        assert metadata.num_rows == sum(len(rows) for rows in reports)
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown format 'xml'"):
+            ArrowWriter(io.BytesIO(), "xml")
+
+    def _read(self, output, format):
+        if format == "parquet":
+            return pyarrow.parquet.read_table(io.BytesIO(output.getvalue()))
+        return pyarrow.ipc.open_stream(output.getvalue()).read_all()
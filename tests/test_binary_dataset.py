@@ -0,0 +1,51 @@
+import pytest
+from mobility_reports import MobilityRow, load
+from mobility_reports.cli import write_as_npy
+
+numpy = pytest.importorskip("numpy")
+from mobility_reports.binary_dataset import NULL, write_dataset
+
+
+class TestBinaryDataset:
+    def test_loads_the_written_rows(self, rows, tmp_path):
+        write_dataset(rows, str(tmp_path))
+        dataset = load(str(tmp_path))
+
+        assert len(dataset) == len(rows)
+        assert [row.as_tuple() for row in dataset.rows()] == [
+            row.as_tuple() for row in rows
+        ]
+
+    def test_memory_maps_fixed_width_arrays(self, rows, tmp_path):
+        write_dataset(rows, str(tmp_path))
+        dataset = load(str(tmp_path))
+
+        assert isinstance(dataset.values, numpy.memmap)
+        assert dataset.values.dtype == numpy.int16
+        assert dataset.values.shape == (len(rows), 6)
+        assert dataset.not_enough_data.dtype == numpy.uint8
+        assert dataset.region.dtype == numpy.int32
+        assert dataset.updated_at[0] == 18350
+        assert not dataset.values.flags.writeable
+
+    def test_stores_missing_values_as_null(self, tmp_path):
+        rows = [
+            MobilityRow("Brazil", None, "2020-03-29", parks=None),
+            MobilityRow("Brazil", "Acre", "2020-03-29", 0b100, parks=-7),
+        ]
+        write_dataset(rows, str(tmp_path))
+        dataset = load(str(tmp_path))
+
+        assert dataset.values[:, 2].tolist() == [NULL, -7]
+        assert dataset.subregion.tolist() == [-1, 1]
+        assert dataset.strings == ["Brazil", "Acre"]
+        assert dataset.not_enough_data.tolist() == [0, 0b100]
+
+    def test_write_as_npy_sorts_the_rows(self, rows, tmp_path):
+        write_as_npy(iter(rows), str(tmp_path))
+
+        dataset = load(str(tmp_path))
+        sorted_rows = sorted(rows, key=MobilityRow.sort_key)
+        assert [row.as_tuple() for row in dataset.rows()] == [
+            row.as_tuple() for row in sorted_rows
+        ]
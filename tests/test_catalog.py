@@ -0,0 +1,125 @@
+import collections
+import json
+import os
+import pathlib
+import shutil
+import pytest
+from mobility_reports import cli, text_cache
+from mobility_reports.catalog import ReportCatalog
+from mobility_reports.cli import main, update_catalog
+
+FIXTURES_PATH = pathlib.Path(__file__).parent / "fixtures"
+
+
+class TestReportCatalog:
+    @pytest.fixture
+    def pdftotext_calls(self, monkeypatch):
+        calls = collections.Counter()
+
+        def pdftotext(report_path, first_page=None, last_page=None):
+            calls[(report_path, first_page, last_page)] += 1
+            with open(report_path, "rt") as fp:
+                text = fp.read()
+            if last_page == 1:
+                return text.split("\x0c")[0] + "\x0c"
+            return text
+
+        monkeypatch.setattr(text_cache, "pdftotext", pdftotext)
+        monkeypatch.setattr(cli, "pdftotext", pdftotext)
+        monkeypatch.setattr(text_cache, "pdf_page_count", lambda report_path: 4)
+        return calls
+
+    @pytest.fixture
+    def report_paths(self, tmp_path):
+        paths = []
+        for name in ("BR", "AR", "CZ"):
+            path = tmp_path / f"2020-03-29_{name}_Mobility_Report_en.pdf"
+            shutil.copy(
+                FIXTURES_PATH / f"2020-03-29_{name}_Mobility_Report_en.txt", path
+            )
+            paths.append(str(path))
+        duplicate_path = tmp_path / "copy_of_BR.pdf"
+        shutil.copy(paths[0], duplicate_path)
+        return paths + [str(duplicate_path)]
+
+    def test_only_probes_new_or_changed_reports(
+        self, report_paths, tmp_path, pdftotext_calls
+    ):
+        catalog_path = str(tmp_path / "catalog.json")
+        update_catalog(ReportCatalog(catalog_path), report_paths[:2])
+
+        catalog = ReportCatalog(catalog_path)
+        assert catalog.stale_paths(report_paths) == report_paths[2:]
+        os.utime(report_paths[0], ns=(0, 0))
+        update_catalog(catalog, report_paths)
+
+        assert sum(pdftotext_calls.values()) == 2 + 3
+        assert all(last_page == 1 for (_, _, last_page) in pdftotext_calls)
+        entry = catalog.get(report_paths[0])
+        assert entry["region"] == "Brazil"
+        assert entry["updated_at"] == "2020-03-29"
+        assert entry["page_count"] == 4
+        assert entry["size"] == os.path.getsize(report_paths[0])
+        assert entry["content_hash"] == text_cache.file_sha256(report_paths[0])
+
+    def test_skips_duplicate_reports(self, report_paths, tmp_path, pdftotext_calls):
+        catalog = ReportCatalog(str(tmp_path / "catalog.json"))
+        update_catalog(catalog, report_paths)
+
+        assert catalog.unique_paths(report_paths) == report_paths[:3]
+
+    def test_finds_reports(self, report_paths, tmp_path, pdftotext_calls):
+        catalog = ReportCatalog(str(tmp_path / "catalog.json"))
+        update_catalog(catalog, report_paths)
+
+        found = catalog.find(region="Brazil")
+        assert [path for (path, _) in found] == sorted(
+            [report_paths[0], report_paths[3]]
+        )
+        assert len(catalog.find(since="2020-03-29", until="2020-03-29")) == 4
+        assert catalog.find(since="2020-04-01") == []
+
+    def test_cli_plans_work_and_records_statuses(
+        self, report_paths, tmp_path, pdftotext_calls, capsys
+    ):
+        catalog_path = str(tmp_path / "catalog.json")
+        output_path = str(tmp_path / "mobility.jsonl")
+
+        main(
+            ["--catalog", catalog_path, "-j", "1", "--format", "jsonl"]
+            + ["--output", output_path, *report_paths]
+        )
+
+        with open(output_path) as fp:
+            assert len(fp.readlines()) == 28 + 25 + 15
+        catalog = ReportCatalog(catalog_path)
+        assert [catalog.get(path)["status"] for path in report_paths] == [
+            "parsed",
+            "parsed",
+            "parsed",
+            None,
+        ]
+
+        main(["catalog", catalog_path, "--region", "Argentina"])
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)["path"] for line in lines] == [report_paths[1]]
+
+    def test_cli_only_probes_reports_selected_by_file_name(
+        self, report_paths, tmp_path, pdftotext_calls
+    ):
+        catalog_path = str(tmp_path / "catalog.json")
+        output_path = str(tmp_path / "mobility.jsonl")
+
+        main(
+            ["--catalog", catalog_path, "-j", "1", "--region", "AR", "--format"]
+            + ["jsonl", "--output", output_path, *report_paths]
+        )
+
+        with open(output_path) as fp:
+            assert len(fp.readlines()) == 25
+        probed_paths = [path for (path, _, last_page) in pdftotext_calls if last_page]
+        assert probed_paths == [report_paths[3], report_paths[1]]
+        catalog = ReportCatalog(catalog_path)
+        assert catalog.get(report_paths[1])["status"] == "parsed"
+        assert catalog.get(report_paths[3])["region"] == "Brazil"
+        assert catalog.get(report_paths[0]) is None
@@ -0,0 +1,426 @@
+import csv
+import io
+import json
+import pathlib
+import pytest
+import time
+from mobility_reports import ReportParser, MobilityRow
+from mobility_reports import cli
+from mobility_reports.parse_cache import ParseCache, ReportKeys
+from mobility_reports.cli import (
+    FIELDNAMES,
+    filter_reports,
+    parse_reports,
+    report_key,
+    update_csv,
+    write_as_csv,
+    write_as_jsonl,
+    write_probes,
+)
+
+
+class TestParseArgs:
+    def test_normalizes_dates(self):
+        args = cli.parse_args(["--since", "20200301", "--until", "2020-03-31", "a.pdf"])
+
+        assert (args.since, args.until) == ("2020-03-01", "2020-03-31")
+
+    @pytest.mark.parametrize(
+        "argv",
+        (
+            ["--since", "2020-3-1", "a.pdf"],
+            ["--until", "2020-03-32", "a.pdf"],
+            ["catalog", "catalog.json", "--since", "March 1"],
+            ["diff", "mobility.csv", "--from", "2020-3-1"],
+            ["diff", "mobility.csv", "--to", "2020/04/05"],
+        ),
+    )
+    def test_rejects_non_iso_dates(self, argv, capsys):
+        with pytest.raises(SystemExit):
+            cli.main(argv)
+
+        assert "invalid date" in capsys.readouterr().err
+
+
+class TestWriteAsCsv:
+    def test_writes_mobility_rows_like_dicts(self, br_report, gb_report):
+        parser = ReportParser()
+        rows = parser.parse(gb_report) + parser.parse(br_report)
+        records = [MobilityRow.from_dict(row) for row in rows]
+
+        dicts_output = io.StringIO()
+        write_as_csv(rows, dicts_output)
+        records_output = io.StringIO()
+        write_as_csv(records, records_output)
+
+        assert records_output.getvalue() == dicts_output.getvalue()
+        assert dicts_output.getvalue().startswith("region,subregion,updated_at,")
+
+    def test_writes_like_dict_writer(self, br_report, us_georgia_report):
+        parser = ReportParser()
+        rows = parser.parse(br_report) + parser.parse(us_georgia_report)
+        rows.sort(key=lambda row: (row["region"], row.get("subregion", "")))
+        dict_writer_output = io.StringIO()
+        csvwriter = csv.DictWriter(dict_writer_output, fieldnames=FIELDNAMES)
+        csvwriter.writeheader()
+        csvwriter.writerows(rows)
+
+        output = io.StringIO()
+        write_as_csv([MobilityRow.from_dict(row) for row in rows], output)
+
+        assert output.getvalue() == dict_writer_output.getvalue()
+
+    def test_writes_rows_in_chunks(self, br_report, monkeypatch):
+        rows = ReportParser().parse(br_report)
+        output = io.StringIO()
+        write_as_csv(rows, output)
+
+        monkeypatch.setattr(cli, "WRITE_CHUNK_SIZE", 3)
+        chunked_output = io.StringIO()
+        write_as_csv(rows, chunked_output)
+
+        assert chunked_output.getvalue() == output.getvalue()
+
+    @pytest.mark.parametrize("buffer_size", (1, 10, 1000))
+    def test_spilling_rows_keeps_the_output(self, br_report, gb_report, buffer_size):
+        parser = ReportParser()
+        rows = [MobilityRow.from_dict(row) for row in parser.parse(gb_report)]
+        rows += [MobilityRow.from_dict(row) for row in parser.parse(br_report)]
+
+        output = io.StringIO()
+        write_as_csv(rows, output)
+        spilled_output = io.StringIO()
+        write_as_csv(iter(rows), spilled_output, buffer_size=buffer_size)
+
+        assert spilled_output.getvalue() == output.getvalue()
+
+
+class TestWriteAsJsonl:
+    def test_writes_the_rows_of_each_report_as_parsed(self, reports):
+        output = FlushCountingStringIO()
+        write_as_jsonl(iter(reports + [None]), output)
+
+        lines = output.getvalue().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            row.as_dict() for rows in reports for row in rows
+        ]
+        assert output.flushes == len(reports)
+
+    @pytest.mark.parametrize("buffer_size", (10, 1000))
+    def test_sorts_the_rows(self, reports, buffer_size):
+        output = io.StringIO()
+        write_as_jsonl(iter(reports), output, sort=True, buffer_size=buffer_size)
+
+        rows = sorted(
+            (row for rows in reports for row in rows), key=MobilityRow.sort_key
+        )
+        lines = output.getvalue().splitlines()
+        assert [json.loads(line) for line in lines] == [row.as_dict() for row in rows]
+
+
+class FlushCountingStringIO(io.StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestWriteProbes:
+    def test_writes_a_probe_per_line(self, monkeypatch):
+        def probe(self, report_path):
+            return {"region": report_path.upper(), "updated_at": "2020-03-29"}
+
+        monkeypatch.setattr(ReportParser, "probe", probe)
+        output = io.StringIO()
+        write_probes(["br.pdf", "ar.pdf"], output)
+
+        assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+            {"path": "br.pdf", "region": "BR.PDF", "updated_at": "2020-03-29"},
+            {"path": "ar.pdf", "region": "AR.PDF", "updated_at": "2020-03-29"},
+        ]
+
+
+class TestFilterReports:
+    @pytest.fixture
+    def report_paths(self, tmp_path):
+        fixtures = pathlib.Path(__file__).parent / "fixtures"
+        paths = []
+        for name in ("BR", "AR", "US_Georgia"):
+            fixture_name = f"2020-03-29_{name}_Mobility_Report_en.txt"
+            path = tmp_path / fixture_name
+            path.write_text(_read_text(str(fixtures / fixture_name)))
+            paths.append(str(path))
+        unnamed_path = tmp_path / "report.txt"
+        unnamed_path.write_text(_read_text(paths[0]))
+        return paths + [str(unnamed_path)]
+
+    @pytest.fixture
+    def extracted_paths(self):
+        extracted_paths = []
+
+        def extract_key(path):
+            extracted_paths.append(path)
+            return _read_text(path)
+
+        extract_key.paths = extracted_paths
+        return extract_key
+
+    def test_filters_by_date_in_file_names(self, report_paths, extracted_paths):
+        assert (
+            filter_reports(
+                report_paths, since="2020-04-01", extract_key=extracted_paths
+            )
+            == []
+        )
+        assert (
+            filter_reports(
+                report_paths, until="2020-03-29", extract_key=extracted_paths
+            )
+            == report_paths
+        )
+        assert extracted_paths.paths == [report_paths[-1]] * 2
+
+    def test_filters_by_region_code_in_file_names(self, report_paths, extracted_paths):
+        selected_paths = filter_reports(
+            report_paths, regions=["AR", "US_Georgia"], extract_key=extracted_paths
+        )
+
+        assert selected_paths == report_paths[1:3]
+        assert extracted_paths.paths == [report_paths[-1]]
+
+    def test_reads_headers_when_regions_may_be_names(
+        self, report_paths, extracted_paths
+    ):
+        selected_paths = filter_reports(
+            report_paths, regions=["AR", "Georgia"], extract_key=extracted_paths
+        )
+
+        assert selected_paths == report_paths[1:3]
+        assert extracted_paths.paths == [
+            report_paths[0],
+            report_paths[2],
+            report_paths[-1],
+        ]
+
+    def test_filters_by_region_name_in_headers(self, report_paths, extracted_paths):
+        selected_paths = filter_reports(
+            report_paths, regions=["Brazil"], extract_key=extracted_paths
+        )
+
+        assert selected_paths == [report_paths[0], report_paths[-1]]
+
+    def test_leaves_out_reports_without_header(self, tmp_path, extracted_paths):
+        path = tmp_path / "invalid.txt"
+        path.write_text("This isn't a mobility report")
+
+        assert (
+            filter_reports([str(path)], since="2020-03-29", extract_key=extracted_paths)
+            == []
+        )
+
+
+class TestParseReports:
+    @pytest.fixture
+    def report_paths(self):
+        fixtures = pathlib.Path(__file__).parent / "fixtures"
+        return [
+            str(fixtures / "2020-03-29_BR_Mobility_Report_en.txt"),
+            str(fixtures / "2020-03-29_AR_Mobility_Report_en.txt"),
+            str(fixtures / "2020-03-29_CZ_Mobility_Report_en.txt"),
+        ]
+
+    @pytest.mark.parametrize("jobs", (1, 2))
+    def test_returns_rows_in_the_reports_order(self, report_paths, jobs):
+        rows = parse_reports(report_paths, jobs=jobs, extract=_read_text)
+
+        expected_rows = []
+        for path in report_paths:
+            expected_rows += ReportParser().parse(_read_text(path))
+        assert [row.as_dict() for row in rows] == expected_rows
+
+    @pytest.mark.parametrize("jobs", (1, 2))
+    def test_skips_unparseable_reports(self, report_paths, tmp_path, jobs):
+        unparseable_path = tmp_path / "unparseable.txt"
+        unparseable_path.write_text(UNPARSEABLE_REPORT)
+
+        rows = parse_reports(
+            [str(unparseable_path), *report_paths], jobs=jobs, extract=_read_text
+        )
+
+        assert len(rows) == 28 + 25 + 15
+
+    @pytest.mark.parametrize("jobs", (1, 2))
+    def test_raises_with_the_report_path(self, report_paths, tmp_path, jobs):
+        invalid_path = tmp_path / "invalid.txt"
+        invalid_path.write_text("This isn't a mobility report")
+
+        with pytest.raises(ValueError, match="Could not parse report .*invalid.txt"):
+            parse_reports(
+                [*report_paths, str(invalid_path)], jobs=jobs, extract=_read_text
+            )
+
+    def test_yields_results_completed_out_of_order_in_order(self):
+        args_list = [(0.2, "slow"), (0, "fast"), (0, "fastest")]
+
+        assert list(cli._imap_in_pool(_sleep_and_return, args_list, jobs=3)) == [
+            "slow",
+            "fast",
+            "fastest",
+        ]
+
+
+class TestUpdateCsv:
+    @pytest.fixture
+    def report_paths(self):
+        fixtures = pathlib.Path(__file__).parent / "fixtures"
+        return [
+            str(fixtures / "2020-03-29_BR_Mobility_Report_en.txt"),
+            str(fixtures / "2020-03-29_AR_Mobility_Report_en.txt"),
+            str(fixtures / "2020-03-29_CZ_Mobility_Report_en.txt"),
+        ]
+
+    def test_report_key(self, report_paths, tmp_path):
+        assert report_key(report_paths[0], _read_text) == ("Brazil", "2020-03-29")
+
+        invalid_path = tmp_path / "invalid.txt"
+        invalid_path.write_text("This isn't a mobility report")
+        assert report_key(str(invalid_path), _read_text) is None
+
+    def test_report_key_raises_extraction_errors(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            report_key(str(tmp_path / "missing.pdf"), _read_text)
+
+    def test_merges_like_writing_all_reports(self, report_paths, tmp_path):
+        csv_path = tmp_path / "mobility.csv"
+
+        assert self._update(csv_path, report_paths[:1]) == 1
+        assert self._update(csv_path, report_paths[1:]) == 2
+
+        assert _read_csv(csv_path) == self._write(report_paths)
+
+    def test_only_parses_missing_reports(self, report_paths, tmp_path):
+        csv_path = tmp_path / "mobility.csv"
+        self._update(csv_path, report_paths[:2])
+
+        assert self._update(csv_path, report_paths) == 1
+        assert self._update(csv_path, report_paths) == 0
+        assert _read_csv(csv_path) == self._write(report_paths)
+
+    def test_replaces_the_rows_of_reports_parsed_again(self, report_paths, tmp_path):
+        csv_path = tmp_path / "mobility.csv"
+        self._update(csv_path, report_paths)
+        fresh_csv = _read_csv(csv_path)
+        with open(csv_path, "wt", newline="") as fp:
+            fp.write(
+                fresh_csv.replace("Brazil,,2020-03-29,-0.71", "Brazil,,2020-03-29,0")
+            )
+
+        assert self._update(csv_path, report_paths[:1]) == 0
+        assert _read_csv(csv_path) != fresh_csv
+        assert self._update_all(csv_path, report_paths[:1]) == 1
+        assert _read_csv(csv_path) == fresh_csv
+
+    def test_only_reads_the_headers_of_changed_reports(self, report_paths, tmp_path):
+        csv_path = tmp_path / "mobility.csv"
+        key_cache = ReportKeys(str(tmp_path / "keys.json"))
+        extracted_paths = []
+
+        def extract_key(path):
+            extracted_paths.append(path)
+            return _read_text(path)
+
+        for _ in range(2):
+            update_csv(
+                str(csv_path),
+                report_paths,
+                extract=_read_text,
+                extract_key=extract_key,
+                key_cache=key_cache,
+            )
+
+        assert extracted_paths == report_paths
+        assert key_cache.stats == {"hits": 3, "misses": 3}
+
+    def test_parses_again_reports_of_other_parser_versions(
+        self, report_paths, tmp_path
+    ):
+        csv_path = tmp_path / "mobility.csv"
+
+        def update(version):
+            return update_csv(
+                str(csv_path),
+                report_paths,
+                extract=_read_text,
+                extract_key=_read_text,
+                parse_cache=ParseCache(str(tmp_path / "cache"), version),
+            )
+
+        update("1")
+        fresh_csv = _read_csv(csv_path)
+        with open(csv_path, "wt", newline="") as fp:
+            fp.write(
+                fresh_csv.replace("Brazil,,2020-03-29,-0.71", "Brazil,,2020-03-29,0")
+            )
+
+        assert update("1") == 0
+        assert update("2") == 3
+        assert _read_csv(csv_path) == fresh_csv
+
+    def test_keeps_the_last_of_the_reports_with_the_same_key(
+        self, report_paths, tmp_path
+    ):
+        csv_path = tmp_path / "mobility.csv"
+        copy_path = tmp_path / "brazil_copy.txt"
+        copy_path.write_text(
+            _read_text(report_paths[0]).replace("-71%", "-70%"), encoding="utf-8"
+        )
+
+        assert self._update(csv_path, [report_paths[0], str(copy_path)]) == 2
+
+        rows = _read_csv(csv_path).splitlines()
+        assert len(rows) == len(set(rows)) == 1 + 28
+        assert "Brazil,,2020-03-29,-0.7," in _read_csv(csv_path)
+
+    def _update(self, csv_path, report_paths):
+        return update_csv(
+            str(csv_path), report_paths, extract=_read_text, extract_key=_read_text
+        )
+
+    def _update_all(self, csv_path, report_paths):
+        return update_csv(
+            str(csv_path), report_paths, extract=_read_text, extract_key=_no_key
+        )
+
+    def _write(self, report_paths):
+        output = io.StringIO()
+        write_as_csv(parse_reports(report_paths, extract=_read_text), output)
+        return output.getvalue()
+
+
+UNPARSEABLE_REPORT = """
+COVID-19 Community Mobility Report
+
+Brazil Smarch 29, 2020
+
+Mobility changes
+"""
+
+
+def _read_text(path):
+    with open(path, "rt") as fp:
+        return fp.read()
+
+
+def _sleep_and_return(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def _no_key(path):
+    return ""
+
+
+def _read_csv(path):
+    with open(path, "rt", newline="") as fp:
+        return fp.read()
@@ -0,0 +1,93 @@
+import io
+import pytest
+from mobility_reports import MobilityRow, ReportParser
+from mobility_reports.cli import main, write_as_csv
+
+numpy = pytest.importorskip("numpy")
+from mobility_reports.diff import diff, diff_dates
+
+
+class TestDiff:
+    @pytest.fixture
+    def old_rows(self, br_report):
+        return [MobilityRow.from_dict(row) for row in ReportParser().parse(br_report)]
+
+    @pytest.fixture
+    def new_rows(self, old_rows):
+        new_rows = []
+        for index, row in enumerate(old_rows[1:]):
+            new_row = MobilityRow.from_dict(row.as_dict())
+            new_row.updated_at = "2020-04-05"
+            if new_row.parks is not None:
+                new_row.parks += index
+            new_rows.append(new_row)
+        new_rows.append(MobilityRow("Brazil", "Atlantis", "2020-04-05", parks=10))
+        return new_rows
+
+    def test_sorts_changes_by_magnitude(self, old_rows, new_rows):
+        report_diff = diff(old_rows, new_rows)
+
+        assert len(report_diff.entities) == len(old_rows) - 1
+        assert report_diff.entities[0] == (new_rows[-2].region, new_rows[-2].subregion)
+        assert list(report_diff.magnitude) == sorted(
+            report_diff.magnitude, reverse=True
+        )
+        assert report_diff.magnitude[-1] == 0
+        parks = report_diff.categories.index("parks")
+        assert report_diff.deltas[0, parks] == pytest.approx(0.26)
+        assert not numpy.nansum(numpy.abs(report_diff.deltas[:, :parks]))
+
+    def test_finds_appeared_and_disappeared_entities(self, old_rows, new_rows):
+        report_diff = diff(old_rows, new_rows)
+
+        assert report_diff.appeared == [("Brazil", "Atlantis")]
+        assert report_diff.disappeared == [("Brazil", None)]
+
+    def test_diff_dates(self, old_rows, new_rows):
+        report_diff = diff_dates(
+            [row.as_dict() for row in old_rows + new_rows], "2020-03-29", "2020-04-05"
+        )
+
+        assert report_diff.entities == diff(old_rows, new_rows).entities
+
+    def test_command(self, old_rows, new_rows, tmp_path, capsys):
+        path = tmp_path / "mobility.csv"
+        with open(path, "wt", newline="") as fp:
+            write_as_csv(old_rows + new_rows, fp)
+
+        main(["diff", str(path)])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == (
+            "change,region,subregion,magnitude,retail_and_recreation,"
+            "grocery_and_pharmacy,parks,transit_stations,workplaces,residential"
+        )
+        region, subregion = diff(old_rows, new_rows).entities[0]
+        assert lines[1].startswith(f"changed,{region},{subregion},0.26,0.0,")
+        assert lines[-2:] == [
+            "appeared,Brazil,Atlantis",
+            "disappeared,Brazil,",
+        ]
+
+    @pytest.mark.parametrize(
+        "argv", ([], ["--from", "2020-03-29", "--to", "2020-03-29"])
+    )
+    def test_command_requires_two_dates(self, old_rows, tmp_path, capsys, argv):
+        path = tmp_path / "mobility.csv"
+        with open(path, "wt", newline="") as fp:
+            write_as_csv(old_rows, fp)
+
+        with pytest.raises(SystemExit):
+            main(["diff", str(path), *argv])
+
+        assert "two different report dates" in capsys.readouterr().err
+
+    def test_command_requires_rows(self, tmp_path, capsys):
+        path = tmp_path / "mobility.csv"
+        with open(path, "wt", newline="") as fp:
+            write_as_csv([], fp)
+
+        with pytest.raises(SystemExit):
+            main(["diff", str(path)])
+
+        assert "two different report dates" in capsys.readouterr().err
@@ -0,0 +1,29 @@
+import random
+import pytest
+from mobility_reports.external_sort import external_sort
+
+
+class TestExternalSort:
+    @pytest.mark.parametrize("buffer_size", (1, 2, 7, 100, 1000))
+    def test_sorts_like_sorted(self, buffer_size, tmp_path):
+        rng = random.Random(buffer_size)
+        items = [(rng.randint(0, 20), index) for index in range(500)]
+        key = lambda item: item[0]
+
+        sorted_items = external_sort(
+            iter(items), key, buffer_size=buffer_size, directory=str(tmp_path)
+        )
+
+        assert list(sorted_items) == sorted(items, key=key)
+
+    def test_removes_the_spilled_runs(self, tmp_path):
+        sorted_items = external_sort(
+            range(10, 0, -1), abs, buffer_size=3, directory=str(tmp_path)
+        )
+
+        assert next(sorted_items) == 1
+        sorted_items.close()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sorts_nothing(self):
+        assert list(external_sort([], abs)) == []
@@ -0,0 +1,65 @@
+import pickle
+import pytest
+from mobility_reports import MobilityRow, ReportParser
+from mobility_reports.cli import FIELDNAMES
+
+
+class TestMobilityRow:
+    @pytest.fixture
+    def rows(self, br_report, us_georgia_report):
+        parser = ReportParser()
+        return parser.parse(br_report) + parser.parse(us_georgia_report)
+
+    def test_as_dict_returns_the_parsed_row(self, rows):
+        for row in rows:
+            assert MobilityRow.from_dict(row).as_dict() == row
+
+    def test_as_tuple_is_in_the_csv_columns_order(self, rows):
+        for row in rows:
+            expected = tuple(row.get(field) for field in FIELDNAMES)
+            assert MobilityRow.from_dict(row).as_tuple() == expected
+
+    def test_packs_not_enough_data_flags(self):
+        row = MobilityRow.from_dict(
+            {
+                "region": "United States",
+                "subregion": "Worth County",
+                "updated_at": "2020-03-29",
+                "parks": None,
+                "residential": None,
+                "parks_not_enough_data": True,
+                "residential_not_enough_data": True,
+            }
+        )
+
+        assert row.not_enough_data == 0b100100
+        assert not row.has_enough_data("parks")
+        assert row.has_enough_data("workplaces")
+
+    def test_stores_percentages_as_integers(self):
+        row = MobilityRow.from_dict(
+            {"region": "Brazil", "updated_at": "2020-03-29", "parks": -0.7}
+        )
+
+        assert row.parks == -70
+        assert row.as_dict()["parks"] == -0.7
+
+    def test_interns_strings(self):
+        region = "".join(["Bra", "zil"])
+        row = MobilityRow(region, None, "2020-03-29")
+        other_row = MobilityRow("Brazil", None, "2020-03-29")
+
+        assert row.region is other_row.region
+
+    def test_uses_slots(self):
+        row = MobilityRow("Brazil", None, "2020-03-29")
+
+        assert not hasattr(row, "__dict__")
+
+    def test_pickles(self, rows):
+        records = [MobilityRow.from_dict(row) for row in rows]
+
+        unpickled = pickle.loads(pickle.dumps(records))
+
+        assert unpickled == records
+        assert [record.as_dict() for record in unpickled] == rows
@@ -0,0 +1,119 @@
+import math
+import random
+import pytest
+from mobility_reports import ReportDocument, ReportParser
+from mobility_reports.not_enough_data import (
+    COLUMNS,
+    MarkersIndex,
+    assign_asterisks_to_columns,
+    assign_asterisks_to_columns_numpy,
+)
+
+
+def _assign_by_linear_scan(columns_positions, asterisks_positions):
+    not_enough_data = set()
+    for asterisk_x, asterisk_y in asterisks_positions:
+        nearest_column_distance = float("inf")
+        nearest_column = None
+        for col, (col_x, col_y) in columns_positions.items():
+            if col in not_enough_data:
+                continue
+            distance = math.sqrt((asterisk_x - col_x) ** 2 + (asterisk_y - col_y) ** 2)
+            if distance < nearest_column_distance:
+                nearest_column_distance = distance
+                nearest_column = col
+        if nearest_column:
+            not_enough_data.add(nearest_column)
+    return not_enough_data
+
+
+@pytest.fixture(params=["python", "numpy"])
+def assign(request):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        return assign_asterisks_to_columns_numpy
+    return assign_asterisks_to_columns
+
+
+class TestAssignAsterisksToColumns:
+    @pytest.mark.parametrize("seed", range(50))
+    def test_matches_linear_scan(self, assign, seed):
+        rng = random.Random(seed)
+        columns = list(COLUMNS)
+        rng.shuffle(columns)
+        columns_positions = {
+            col: (rng.randrange(0, 140), rng.randrange(0, 40)) for col in columns
+        }
+        asterisks_positions = sorted(
+            (rng.randrange(0, 140), rng.randrange(0, 40))
+            for _ in range(rng.randrange(0, 8))
+        )
+
+        assert assign(columns_positions, asterisks_positions) == _assign_by_linear_scan(
+            columns_positions, asterisks_positions
+        )
+
+    def test_breaks_ties_by_columns_order(self, assign):
+        columns_positions = {"parks": (10, 0), "residential": (0, 10)}
+
+        assert assign(columns_positions, [(0, 0)]) == {"parks"}
+
+    def test_numpy_backend_matches_python_backend_on_reports(
+        self, ar_report, br_report, cz_report, gb_report, kr_report, us_georgia_report
+    ):
+        pytest.importorskip("numpy")
+
+        for report in (
+            ar_report,
+            br_report,
+            cz_report,
+            gb_report,
+            kr_report,
+            us_georgia_report,
+        ):
+            python_rows = ReportParser(backend="python").parse(report)
+            numpy_rows = ReportParser(backend="numpy").parse(report)
+            assert numpy_rows == python_rows
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            ReportParser(backend="fortran")
+
+
+class TestMarkersIndex:
+    text = "\n".join(
+        [
+            "Some County",
+            "",
+            "Retail & recreation    Grocery & pharmacy   Parks",
+            "     *",
+            "Transit stations   Workplace   Residential",
+            "                                   *",
+            "\x0c* Not enough data for this date",
+        ]
+    )
+
+    def test_find_columns(self):
+        markers_index = MarkersIndex(ReportDocument(self.text))
+
+        assert markers_index.find_columns(0, len(self.text)) == {
+            "retail_and_recreation": (9, 2),
+            "grocery_and_pharmacy": (32, 2),
+            "parks": (46, 2),
+            "transit_stations": (8, 4),
+            "workplaces": (23, 4),
+            "residential": (36, 4),
+        }
+
+    def test_find_asterisks(self):
+        markers_index = MarkersIndex(ReportDocument(self.text))
+
+        assert markers_index.find_asterisks(0, len(self.text), 2, 9) == [
+            (5, 3),
+            (35, 5),
+            (0, 7),
+        ]
+        assert markers_index.find_asterisks(0, len(self.text), 2, 5) == [
+            (5, 3),
+            (35, 5),
+        ]
@@ -0,0 +1,62 @@
+import pytest
+from mobility_reports import build_panel
+
+numpy = pytest.importorskip("numpy")
+from mobility_reports.binary_dataset import BinaryDataset
+
+
+class TestBuildPanel:
+    @pytest.fixture
+    def rows(self, rows, later_rows):
+        return later_rows + rows
+
+    def test_pivots_the_rows(self, rows):
+        panel = build_panel(rows)
+
+        entities = {(row.region, row.subregion) for row in rows}
+        assert panel.values.shape == (len(entities), 2, 6)
+        assert panel.dates == ["2020-03-29", "2020-04-05"]
+        assert panel.entities == sorted(
+            entities, key=lambda entity: (entity[0], entity[1] or "")
+        )
+        for row in rows:
+            entity = panel.entity(row.region, row.subregion)
+            date = panel.dates.index(row.updated_at)
+            expected = [
+                numpy.nan if value is None else value for value in row.as_tuple()[3:9]
+            ]
+            numpy.testing.assert_array_equal(panel.values[entity, date], expected)
+
+    def test_masks_missing_values(self, rows):
+        panel = build_panel(rows)
+
+        assert panel.missing.sum() == numpy.isnan(panel.values).sum()
+        brazil = panel.entity("Brazil")
+        assert panel.missing[brazil, 1].all()
+        assert not panel.missing[brazil, 0].any()
+
+    def test_changes(self, rows):
+        panel = build_panel(rows)
+        changes, missing = panel.changes()
+
+        parks = panel.categories.index("parks")
+        assert changes.shape == (len(panel.entities), 1, 6)
+        for row in rows[:10]:
+            entity = panel.entity(row.region, row.subregion)
+            previous = panel.values[entity, 0, parks]
+            if numpy.isnan(previous):
+                assert missing[entity, 0, parks]
+            else:
+                assert changes[entity, 0, parks] == pytest.approx(0.1 - previous)
+        assert missing[panel.entity("Brazil")].all()
+
+    def test_builds_from_a_binary_dataset(self, rows):
+        panel = build_panel(BinaryDataset.from_rows(rows))
+
+        numpy.testing.assert_array_equal(panel.values, build_panel(rows).values)
+        assert panel.entities == build_panel(rows).entities
+
+    def test_builds_from_dicts(self, rows):
+        panel = build_panel(row.as_dict() for row in rows)
+
+        numpy.testing.assert_array_equal(panel.values, build_panel(rows).values)
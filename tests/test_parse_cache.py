@@ -0,0 +1,129 @@
+import os
+import pathlib
+import pytest
+from mobility_reports import MobilityRow, ReportParser
+from mobility_reports.cli import parse_reports
+from mobility_reports.parse_cache import (
+    FileHashes,
+    ParseCache,
+    ReportKeys,
+    parser_version,
+)
+
+
+class TestFileHashes:
+    def test_only_hashes_changed_files(self, tmp_path):
+        report_path = tmp_path / "report.pdf"
+        report_path.write_bytes(b"Brazil")
+        file_hashes = FileHashes(str(tmp_path / "files.json"))
+
+        sha256 = file_hashes.sha256(str(report_path))
+        assert file_hashes.sha256(str(report_path)) == sha256
+        assert file_hashes.stats == {"hashed": 1, "unchanged": 1}
+
+        report_path.write_bytes(b"Argentina")
+        os.utime(report_path, ns=(0, 0))
+        assert file_hashes.sha256(str(report_path)) != sha256
+        assert file_hashes.stats["hashed"] == 2
+
+    def test_saves_hashes(self, tmp_path):
+        report_path = tmp_path / "report.pdf"
+        report_path.write_bytes(b"Brazil")
+        file_hashes = FileHashes(str(tmp_path / "files.json"))
+        sha256 = file_hashes.sha256(str(report_path))
+        file_hashes.save()
+
+        file_hashes = FileHashes(str(tmp_path / "files.json"))
+        assert file_hashes.sha256(str(report_path)) == sha256
+        assert file_hashes.stats == {"unchanged": 1}
+
+
+class TestReportKeys:
+    def test_remembers_keys_of_unchanged_reports(self, tmp_path):
+        report_path = tmp_path / "report.pdf"
+        report_path.write_bytes(b"Brazil")
+        report_keys = ReportKeys(str(tmp_path / "keys.json"), version="1")
+
+        assert report_keys.get(str(report_path)) == (False, None)
+        report_keys.put(str(report_path), ("Brazil", "2020-03-29"))
+        report_keys.save()
+
+        report_keys = ReportKeys(str(tmp_path / "keys.json"), version="1")
+        assert report_keys.get(str(report_path)) == (True, ("Brazil", "2020-03-29"))
+        report_path.write_bytes(b"Argentina")
+        assert report_keys.get(str(report_path)) == (False, None)
+        assert report_keys.stats == {"hits": 1, "misses": 1}
+
+    def test_remembers_unparseable_headers(self, tmp_path):
+        report_path = tmp_path / "report.pdf"
+        report_path.write_bytes(b"Brazil")
+        report_keys = ReportKeys(str(tmp_path / "keys.json"), version="1")
+        report_keys.put(str(report_path), None)
+
+        assert report_keys.get(str(report_path)) == (True, None)
+
+    def test_discards_keys_of_other_parser_versions(self, tmp_path):
+        report_path = tmp_path / "report.pdf"
+        report_path.write_bytes(b"Brazil")
+        report_keys = ReportKeys(str(tmp_path / "keys.json"), version="1")
+        report_keys.put(str(report_path), ("Brazil", "2020-03-29"))
+        report_keys.save()
+
+        report_keys = ReportKeys(str(tmp_path / "keys.json"), version="2")
+        assert report_keys.get(str(report_path)) == (False, None)
+
+
+class TestParseCache:
+    @pytest.fixture
+    def report_path(self, tmp_path, br_report):
+        path = tmp_path / "2020-03-29_BR_Mobility_Report_en.txt"
+        path.write_text(br_report)
+        return str(path)
+
+    def test_caches_rows(self, tmp_path, report_path, br_report):
+        rows = [MobilityRow.from_dict(row) for row in ReportParser().parse(br_report)]
+        cache = ParseCache(str(tmp_path / "cache"), version="1")
+
+        assert cache.get(report_path) == (False, None)
+        cache.put(report_path, rows)
+        assert cache.get(report_path) == (True, rows)
+        assert cache.stats == {"hits": 1, "misses": 1}
+
+    def test_caches_unparseable_reports(self, tmp_path, report_path):
+        cache = ParseCache(str(tmp_path / "cache"), version="1")
+        cache.put(report_path, None)
+
+        assert cache.get(report_path) == (True, None)
+
+    def test_keys_on_the_parser_version(self, tmp_path, report_path):
+        ParseCache(str(tmp_path / "cache"), version="1").put(report_path, [])
+
+        assert ParseCache(str(tmp_path / "cache"), version="2").get(report_path) == (
+            False,
+            None,
+        )
+
+    def test_parser_version_is_a_fingerprint(self):
+        assert parser_version() == parser_version()
+        assert len(parser_version()) == 64
+
+    def test_parse_reports_skips_cached_reports(self, tmp_path, report_path):
+        extracted = []
+
+        def extract(path):
+            extracted.append(path)
+            return pathlib.Path(path).read_text()
+
+        parse_cache = ParseCache(str(tmp_path / "cache"))
+        rows = parse_reports([report_path], extract=extract, parse_cache=parse_cache)
+        assert parse_cache.stats == {"misses": 1}
+
+        parse_cache = ParseCache(str(tmp_path / "cache"))
+        cached_rows = parse_reports(
+            [report_path], extract=extract, parse_cache=parse_cache
+        )
+        assert parse_cache.stats == {"hits": 1}
+
+        assert extracted == [report_path]
+        assert cached_rows == rows
+        assert len(rows) == 28
@@ -0,0 +1,60 @@
+import io
+import json
+import pytest
+from mobility_reports.cli import write_as_csv, write_as_partitions
+from mobility_reports.partitions import partition_path, read_manifest
+
+
+class TestPartitions:
+    def test_partition_path(self):
+        assert partition_path("Brazil", "2020-03-29", "csv") == (
+            "region=Brazil/updated_at=2020-03-29/part.csv"
+        )
+        assert partition_path("Côte d'Ivoire/1", "2020-03-29", "csv") == (
+            "region=C%C3%B4te d%27Ivoire%2F1/updated_at=2020-03-29/part.csv"
+        )
+
+    def test_writes_a_csv_per_report(self, reports, tmp_path):
+        write_as_partitions(iter(reports), str(tmp_path), "csv")
+
+        for rows in reports:
+            path = partition_path(rows[0].region, rows[0].updated_at, "csv")
+            expected_output = io.StringIO()
+            write_as_csv(rows, expected_output)
+            with open(tmp_path / path, "rt", newline="") as fp:
+                assert fp.read() == expected_output.getvalue()
+
+    def test_writes_the_manifest(self, reports, tmp_path):
+        write_as_partitions(iter(reports[:1]), str(tmp_path), "csv")
+        manifest = write_as_partitions(iter(reports), str(tmp_path), "csv")
+
+        assert manifest == read_manifest(str(tmp_path))
+        assert json.loads((tmp_path / "manifest.json").read_text()) == manifest
+        assert manifest["partitions"] == [
+            {
+                "region": "Brazil",
+                "updated_at": "2020-03-29",
+                "path": "region=Brazil/updated_at=2020-03-29/part.csv",
+                "rows": len(reports[1]),
+            },
+            {
+                "region": "Georgia",
+                "updated_at": "2020-03-29",
+                "path": "region=Georgia/updated_at=2020-03-29/part.csv",
+                "rows": len(reports[0]),
+            },
+        ]
+
+    def test_writes_parquet_partitions(self, reports, tmp_path):
+        pyarrow = pytest.importorskip("pyarrow")
+        import pyarrow.parquet
+
+        manifest = write_as_partitions(iter(reports), str(tmp_path), "parquet")
+
+        for partition in manifest["partitions"]:
+            table = pyarrow.parquet.read_table(str(tmp_path / partition["path"]))
+            assert table.num_rows == partition["rows"]
+        assert not list(tmp_path.glob("**/*.tmp"))
+
+    def test_read_manifest_of_an_empty_directory(self, tmp_path):
+        assert read_manifest(str(tmp_path)) == {"partitions": []}
@@ -0,0 +1,83 @@
+import pytest
+from mobility_reports import ReportDocument, ReportParser
+from mobility_reports.report_document import PageIndex
+
+
+class TestReportDocument:
+    def test_normalizes_text(self):
+        document = ReportDocument(
+            "\n\n  Brazil   March 29, 2020\n\n\nMobility  changes\n "
+        )
+
+        assert document.clean_text == "Brazil March 29, 2020\nMobility changes"
+
+    @pytest.mark.parametrize(
+        "raw_offset,clean_offset",
+        (
+            (0, 0),
+            (4, 0),
+            (10, 6),
+            (12, 6),
+            (13, 7),
+            (28, 21),
+            (30, 22),
+        ),
+    )
+    def test_to_clean_offset(self, raw_offset, clean_offset):
+        document = ReportDocument(
+            "\n\n  Brazil   March 29, 2020\n\n\nMobility  changes\n "
+        )
+
+        assert document.to_clean_offset(raw_offset) == clean_offset
+
+    def test_to_raw_offset(self):
+        text = "\n\n  Brazil   March 29, 2020\n\n\nMobility  changes\n "
+        document = ReportDocument(text)
+
+        for clean_offset, char in enumerate(document.clean_text):
+            assert text[document.to_raw_offset(clean_offset)] == char
+
+    def test_from_text_reuses_documents(self):
+        document = ReportDocument("Brazil")
+
+        assert ReportDocument.from_text(document) is document
+        assert ReportDocument.from_text("Brazil").text == "Brazil"
+
+    def test_parser_accepts_documents(self, br_report):
+        parser = ReportParser()
+        document = ReportDocument(br_report)
+
+        assert parser.parse(document) == parser.parse(br_report)
+        assert parser.parse_region(document) == "Brazil"
+        assert parser.parse_date(document) == "2020-03-29"
+
+
+class TestPageIndex:
+    text = "Brazil\nMarch 29\n\x0cFederal District\n\nParks\x0c"
+
+    def test_locate(self):
+        index = PageIndex(self.text)
+
+        assert index.locate(0) == (0, 0, 0)
+        assert index.locate(9) == (0, 1, 2)
+        assert index.locate(17) == (1, 3, 0)
+        assert index.locate(38) == (1, 5, 3)
+
+    def test_page_lines(self):
+        index = PageIndex(self.text)
+
+        assert index.page_lines(0) == range(0, 3)
+        assert index.page_lines(1) == range(3, 6)
+
+    @pytest.mark.parametrize("offset", (0, 16, 17, 40, 41))
+    def test_next_page_break(self, offset):
+        index = PageIndex(self.text)
+
+        assert index.next_page_break(offset) == self.text.find("\x0c", offset)
+
+    @pytest.mark.parametrize("start,end", ((0, 41), (3, 20), (7, 16), (20, 35)))
+    def test_line_spans(self, start, end):
+        index = PageIndex(self.text)
+
+        lines = [self.text[a:b] for (a, b) in index.line_spans(start, end)]
+        assert lines == self.text[start:end].splitlines()
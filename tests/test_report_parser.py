@@ -2,7 +2,9 @@ import os
 import pathlib
 import re
 import pytest
-from mobility_reports import ReportParser
+from mobility_reports import ReportParser, text_cache
+
+FIXTURES_PATH = pathlib.Path(__file__).parent / "fixtures"
 
 
 class ReportParserSampleReportTests:
@@ -25,6 +27,19 @@ class ReportParserSampleReportTests:
 
         assert len(data) == self.expected_num_of_rows
 
+    def test_iter_rows(self, report):
+        if self.expected_region is None or self.expected_date is None:
+            pytest.skip()
+
+        parser = ReportParser()
+        rows = parser.iter_rows(report)
+        overall = next(rows)
+
+        assert overall["region"] == self.expected_region
+        assert overall["updated_at"] == self.expected_date
+        assert "subregion" not in overall
+        assert [overall, *rows] == parser.parse(report)
+
     def test_parse_overall_mobility_changes(self, report):
         if self.expected_overall is None:
             pytest.skip()
@@ -3916,38 +3931,55 @@ class TestReportParserUSGeorgiaReport(ReportParserSampleReportTests):
         return us_georgia_report
 
 
-@pytest.fixture(scope="session")
-def ar_report():
-    return _read_fixture("2020-03-29_AR_Mobility_Report_en.txt")
+class TestReportParserParseHeader:
+    def test_parses_the_region_and_date(self, br_report):
+        assert ReportParser().parse_header(br_report) == ("Brazil", "2020-03-29")
+
+    def test_parses_the_first_page(self, br_report):
+        first_page = br_report.split("\x0c")[0]
 
+        assert ReportParser().parse_header(first_page) == ("Brazil", "2020-03-29")
 
-@pytest.fixture(scope="session")
-def br_report():
-    return _read_fixture("2020-03-29_BR_Mobility_Report_en.txt")
+    def test_returns_none_without_header(self, br_report):
+        assert ReportParser().parse_header("This isn't a mobility report") is None
+        malformed_date = br_report.replace("March 29, 2020", "Smarch 29, 2020")
+        assert ReportParser().parse_header(malformed_date) is None
 
 
-@pytest.fixture(scope="session")
-def gb_report():
-    return _read_fixture("2020-03-29_GB_Mobility_Report_en.txt")
+class TestReportParserProbe:
+    @pytest.fixture
+    def pdftotext_calls(self, monkeypatch):
+        calls = []
+
+        def pdftotext(report_path, first_page=None, last_page=None):
+            calls.append((report_path, first_page, last_page))
+            with open(report_path, "rt") as fp:
+                return fp.read().split("\x0c")[0] + "\x0c"
 
+        monkeypatch.setattr(text_cache, "pdftotext", pdftotext)
+        monkeypatch.setattr(text_cache, "pdf_page_count", lambda report_path: 4)
+        return calls
 
-@pytest.fixture(scope="session")
-def cz_report():
-    return _read_fixture("2020-03-29_CZ_Mobility_Report_en.txt")
+    def test_probes_only_the_first_page(self, pdftotext_calls):
+        report_path = str(FIXTURES_PATH / "2020-03-29_BR_Mobility_Report_en.txt")
 
+        probe = ReportParser().probe(report_path)
 
-@pytest.fixture(scope="session")
-def us_georgia_report():
-    return _read_fixture("2020-03-29_US_Georgia_Mobility_Report_en.txt")
+        assert probe == {
+            "region": "Brazil",
+            "updated_at": "2020-03-29",
+            "page_count": 4,
+            "content_hash": text_cache.file_sha256(report_path),
+        }
+        assert pdftotext_calls == [(report_path, 1, 1)]
 
+    def test_probes_reports_without_header(self, tmp_path, pdftotext_calls):
+        report_path = tmp_path / "report.txt"
+        report_path.write_text("This isn't a mobility report")
 
-@pytest.fixture(scope="session")
-def kr_report():
-    return _read_fixture("2020-03-29_KR_Mobility_Report_en.txt")
+        probe = ReportParser().probe(str(report_path))
 
+        assert probe["region"] is None
+        assert probe["updated_at"] is None
+        assert probe["page_count"] == 4
 
-def _read_fixture(name):
-    path = pathlib.Path(__file__).parent / f"fixtures/{name}"
-    with open(path, "rt") as fp:
-        contents = fp.read()
-    return contents
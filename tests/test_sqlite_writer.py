@@ -0,0 +1,61 @@
+import sqlite3
+import pytest
+from mobility_reports import MobilityRow
+from mobility_reports.cli import FIELDNAMES, write_as_sqlite
+from mobility_reports.sqlite_writer import COLUMNS, SQLiteWriter
+
+
+class TestSQLiteWriter:
+    def test_columns_are_the_csv_columns(self):
+        assert list(COLUMNS) == FIELDNAMES
+
+    def test_writes_the_rows(self, reports, tmp_path):
+        path = str(tmp_path / "mobility.db")
+        write_as_sqlite(iter(reports), path)
+
+        expected_rows = sorted(
+            (row for rows in reports for row in rows), key=MobilityRow.sort_key
+        )
+        assert self._select(path) == [
+            (row.region, row.subregion or "", *row.as_tuple()[2:])
+            for row in expected_rows
+        ]
+
+    def test_upserts_rows_on_reruns(self, reports, tmp_path):
+        path = str(tmp_path / "mobility.db")
+        write_as_sqlite(reports[:1], path)
+        rows = self._select(path)
+        with sqlite3.connect(path) as connection:
+            connection.execute("UPDATE mobility_reports SET parks = 1")
+
+        write_as_sqlite(reports, path)
+        write_as_sqlite(reports, path)
+
+        assert [row for row in self._select(path) if row[0] == "Georgia"] == rows
+        assert len(self._select(path)) == sum(len(rows) for rows in reports)
+
+    def test_builds_the_key_index(self, reports, tmp_path):
+        path = str(tmp_path / "mobility.db")
+        write_as_sqlite(reports, path)
+
+        with sqlite3.connect(path) as connection:
+            plan = connection.execute(
+                "EXPLAIN QUERY PLAN SELECT updated_at FROM mobility_reports "
+                "WHERE region = 'Brazil' AND subregion = ''"
+            ).fetchall()
+        assert "COVERING INDEX mobility_reports_key" in plan[0][-1]
+
+    def test_keeps_the_table_on_errors(self, reports, tmp_path):
+        path = str(tmp_path / "mobility.db")
+        with pytest.raises(RuntimeError):
+            with SQLiteWriter(path, transaction_size=1) as writer:
+                writer.write_rows([row.as_tuple() for row in reports[0]])
+                raise RuntimeError()
+
+        assert self._select(path) == []
+
+    def _select(self, path):
+        with sqlite3.connect(path) as connection:
+            return connection.execute(
+                "SELECT * FROM mobility_reports ORDER BY region, subregion, updated_at"
+            ).fetchall()
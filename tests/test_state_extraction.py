@@ -1,7 +1,8 @@
 import re
 import pytest
 
-from mobility_reports import template_to_regexp
+from mobility_reports import ReportParser, template_to_regexp, compile_template
+from mobility_reports.template_to_regexp import compile_counts
 
 
 class TestTemplateToRegexp:
@@ -67,3 +68,27 @@ How are {who}?
         assert matches.groupdict() == {
             "who": "you",
         }
+
+
+class TestCompileTemplate:
+    def test_compiles_template(self):
+        regexp = compile_template("I want {what_do_i_want}.")
+
+        assert regexp.match("I want to break free.").groupdict() == {
+            "what_do_i_want": "to break free",
+        }
+
+    def test_caches_compiled_templates(self):
+        template = "I want {what_do_i_want} now."
+        compiles = compile_counts["template"]
+
+        assert compile_template(template) is compile_template(template)
+        assert compile_counts["template"] == compiles + 1
+
+    def test_parsing_compiles_no_patterns(self, br_report):
+        ReportParser().parse(br_report)
+        counts = dict(compile_counts)
+
+        ReportParser().parse(br_report)
+
+        assert dict(compile_counts) == counts
@@ -0,0 +1,111 @@
+import io
+import pytest
+from mobility_reports import MobilityRow
+from mobility_reports.cli import (
+    write_as_csv,
+    write_as_jsonl,
+    write_as_npy,
+    write_as_partitions,
+    write_as_sqlite,
+)
+from mobility_reports.store import MobilityStore, read_rows
+
+
+class TestMobilityStore:
+    @pytest.fixture
+    def rows(self, rows, later_rows):
+        return rows + later_rows
+
+    @pytest.fixture
+    def store(self, rows):
+        return MobilityStore(reversed(rows))
+
+    def test_get(self, store, rows):
+        assert store.get("Georgia") == [
+            row for row in rows if row.region == "Georgia" and not row.subregion
+        ]
+        assert [row.as_tuple() for row in store.get("Georgia", "Appling County")] == [
+            row.as_tuple() for row in rows if row.subregion == "Appling County"
+        ]
+        assert store.get("Georgia", "Nowhere") == []
+        assert store.get("Nowhere") == []
+
+    def test_get_date_range(self, store):
+        rows = store.get("Georgia", "Appling County", since="2020-04-01")
+        assert [row.updated_at for row in rows] == ["2020-04-05"]
+
+        rows = store.get("Georgia", "Appling County", until="2020-04-01")
+        assert [row.updated_at for row in rows] == ["2020-03-29"]
+
+        rows = store.get("Georgia", since="2020-03-29", until="2020-04-05")
+        assert [row.updated_at for row in rows] == ["2020-03-29", "2020-04-05"]
+
+    def test_get_region(self, store, rows):
+        region_rows = store.get_region("Brazil")
+
+        assert len(region_rows) == len([row for row in rows if row.region == "Brazil"])
+        assert region_rows[0].subregion is None
+        assert region_rows == sorted(region_rows, key=MobilityRow.sort_key)
+
+    def test_subregions(self, store, rows):
+        assert store.subregions("Brazil") == sorted(
+            row.subregion for row in rows if row.region == "Brazil" and row.subregion
+        )
+        assert store.subregions("Nowhere") == []
+        assert store.regions() == ["Brazil", "Georgia"]
+
+    def test_between(self, store, rows):
+        assert len(store.between(since="2020-04-01")) == 10
+        assert len(store.between(until="2020-04-01")) == len(rows) - 10
+        assert len(store.between()) == len(rows)
+        assert store.between("2020-04-06", "2020-04-10") == []
+
+    @pytest.mark.parametrize("format", ("csv", "jsonl", "sqlite", "npy"))
+    def test_loads_every_format(self, rows, format, tmp_path):
+        if format == "npy":
+            pytest.importorskip("numpy")
+        path = str(tmp_path / f"mobility.{format}")
+        if format == "csv":
+            with open(path, "wt", newline="") as fp:
+                write_as_csv(rows, fp)
+        elif format == "jsonl":
+            with open(path, "wt") as fp:
+                write_as_jsonl([rows], fp)
+        elif format == "sqlite":
+            path = str(tmp_path / "mobility.db")
+            write_as_sqlite([rows], path)
+        else:
+            write_as_npy(rows, path)
+
+        store = MobilityStore.load(path)
+
+        expected_rows = sorted(rows, key=MobilityRow.sort_key)
+        assert [store.row(index).as_tuple() for index in range(len(store))] == [
+            row.as_tuple() for row in expected_rows
+        ]
+
+    @pytest.mark.parametrize("format", ("parquet", "arrow"))
+    def test_loads_arrow_formats(self, rows, format, tmp_path):
+        pytest.importorskip("pyarrow")
+        from mobility_reports.cli import write_as_arrow
+
+        path = str(tmp_path / f"mobility.{format}")
+        with open(path, "wb") as fp:
+            write_as_arrow([rows], fp, format)
+
+        assert [row.as_tuple() for row in read_rows(path)] == [
+            row.as_tuple() for row in sorted(rows, key=MobilityRow.sort_key)
+        ]
+
+    @pytest.mark.parametrize("format", ("csv", "parquet"))
+    def test_loads_partitions(self, rows, format, tmp_path):
+        if format == "parquet":
+            pytest.importorskip("pyarrow")
+        path = str(tmp_path / "mobility")
+        write_as_partitions([rows], path, format)
+
+        store = MobilityStore.load(path)
+
+        assert [store.row(index).as_tuple() for index in range(len(store))] == [
+            row.as_tuple() for row in sorted(rows, key=MobilityRow.sort_key)
+        ]
@@ -0,0 +1,62 @@
+import collections
+import pytest
+from mobility_reports import text_cache
+from mobility_reports.text_cache import TextCache
+
+
+class TestTextCache:
+    @pytest.fixture
+    def pdftotext_calls(self, monkeypatch):
+        calls = collections.Counter()
+
+        def pdftotext(report_path):
+            calls[report_path] += 1
+            with open(report_path, "rb") as fp:
+                return f"Text of {fp.read().decode()}\r\n\x0c"
+
+        monkeypatch.setattr(text_cache, "pdftotext", pdftotext)
+        return calls
+
+    @pytest.fixture
+    def report_path(self, tmp_path):
+        path = tmp_path / "2020-03-29_BR_Mobility_Report_en.pdf"
+        path.write_bytes(b"Brazil")
+        return str(path)
+
+    def test_extracts_each_report_once(self, tmp_path, report_path, pdftotext_calls):
+        cache = TextCache(str(tmp_path / "cache"), version="pdftotext version 0.86.1")
+
+        assert cache.extract(report_path) == "Text of Brazil\r\n\x0c"
+        assert cache.extract(report_path) == "Text of Brazil\r\n\x0c"
+        assert pdftotext_calls[report_path] == 1
+        assert cache.pop_stats() == {"hits": 1, "misses": 1}
+        assert cache.stats == {}
+
+    def test_keys_on_the_report_contents(self, tmp_path, report_path, pdftotext_calls):
+        cache = TextCache(str(tmp_path / "cache"), version="pdftotext version 0.86.1")
+        cache.extract(report_path)
+
+        with open(report_path, "wb") as fp:
+            fp.write(b"Argentina")
+
+        assert cache.extract(report_path) == "Text of Argentina\r\n\x0c"
+        assert pdftotext_calls[report_path] == 2
+
+    def test_keys_on_the_pdftotext_version(
+        self, tmp_path, report_path, pdftotext_calls
+    ):
+        TextCache(str(tmp_path / "cache"), version="pdftotext version 0.86.1").extract(
+            report_path
+        )
+        TextCache(str(tmp_path / "cache"), version="pdftotext version 20.09.0").extract(
+            report_path
+        )
+
+        assert pdftotext_calls[report_path] == 2
+
+    def test_stores_compressed_entries(self, tmp_path, report_path, pdftotext_calls):
+        cache = TextCache(str(tmp_path / "cache"), version="pdftotext version 0.86.1")
+        cache.extract(report_path)
+
+        with open(cache.path(report_path), "rb") as fp:
+            assert fp.read(2) == b"\x1f\x8b"